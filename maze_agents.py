@@ -0,0 +1,167 @@
+"""Many agents racing through one maze, stepped together with NumPy.
+
+``AgentSwarm`` keeps every agent as a column in a set of parallel arrays
+(struct of arrays): positions, move counters, finish ticks and, for bots,
+skill and speed. One ``step()`` per game tick picks bot moves from the
+shared ``DistanceField``, validates every move against the grid and
+detects arrivals as whole-array operations, so a thousand agents cost
+about as much as a handful. The local player is an agent too: the game
+moves it at once on a key press and records that with ``place()``, so
+player and bots share one set of standings. NumPy is only needed for race
+mode.
+"""
+import numpy as np
+
+from maze_grid import PATH
+from maze_solver import DistanceField
+
+# (dx, dy) for direction codes 0-3, in maze_core.DIRECTIONS order
+STEPS_X = np.array([0, 0, -1, 1], dtype=np.int32)
+STEPS_Y = np.array([-1, 1, 0, 0], dtype=np.int32)
+UNREACHABLE = np.iinfo(np.int32).max
+
+
+class AgentSwarm:
+    """Struct-of-arrays store for every player and bot in one maze.
+
+    Bots move at ``rate`` moves per second and take the step that the
+    distance field says leads home with probability ``skill``, otherwise
+    a random one. Other agents are driven by ``push()`` and move on the
+    next ``step()``. ``finished`` holds the tick each agent arrived, or -1.
+    """
+
+    def __init__(self, maze, goal, distance_field=None, seed=None):
+        if distance_field is None:
+            distance_field = DistanceField(maze, goal)
+        self.width = maze.width
+        self.height = maze.height
+        self.open = np.frombuffer(bytes(maze.cells), dtype=np.uint8) == PATH
+        distances = np.frombuffer(distance_field.distances, dtype=np.int32)
+        self.distances = np.where(distances < 0, UNREACHABLE, distances)
+        self.goal = goal
+        self.rng = np.random.default_rng(seed)
+        self.tick = 0
+
+        self.x = np.zeros(0, dtype=np.int32)
+        self.y = np.zeros(0, dtype=np.int32)
+        self.moves = np.zeros(0, dtype=np.int32)
+        self.finished = np.zeros(0, dtype=np.int32)
+        self.bot = np.zeros(0, dtype=bool)
+        self.skill = np.zeros(0)
+        self.rate = np.zeros(0)
+        self.budget = np.zeros(0)
+        # Pending direction code per agent, -1 for none
+        self.intent = np.zeros(0, dtype=np.int8)
+
+    def __len__(self):
+        return len(self.x)
+
+    def add(self, count, start, bot=False, skill=1.0, rate=0.0):
+        """Append ``count`` agents at ``start``; returns their indices"""
+        first = len(self)
+        self.x = np.append(self.x, np.full(count, start[0], dtype=np.int32))
+        self.y = np.append(self.y, np.full(count, start[1], dtype=np.int32))
+        self.moves = np.append(self.moves, np.zeros(count, dtype=np.int32))
+        self.finished = np.append(self.finished, np.full(count, -1, dtype=np.int32))
+        self.bot = np.append(self.bot, np.full(count, bot))
+        self.skill = np.append(self.skill, np.broadcast_to(skill, count))
+        self.rate = np.append(self.rate, np.broadcast_to(rate, count))
+        self.budget = np.append(self.budget, np.zeros(count))
+        self.intent = np.append(self.intent, np.full(count, -1, dtype=np.int8))
+        return np.arange(first, first + count)
+
+    def add_bots(self, count, start, skill=(0.6, 0.95), rate=(4.0, 12.0)):
+        """Append ``count`` bots with skill and speed drawn uniformly from the ranges"""
+        return self.add(count, start, bot=True,
+                        skill=self.rng.uniform(*skill, count), rate=self.rng.uniform(*rate, count))
+
+    def push(self, agent, code):
+        """Queue direction ``code`` for a non-bot agent's next step"""
+        self.intent[agent] = code
+
+    def place(self, agent, x, y):
+        """Record a move an agent made outside ``step()``, such as the local player.
+
+        The caller has already validated the move. Arriving at the goal
+        counts as finishing in the current tick, behind any agent that
+        reached it earlier in the same tick.
+        """
+        self.x[agent] = x
+        self.y[agent] = y
+        self.moves[agent] += 1
+        if self.finished[agent] < 0 and (x, y) == tuple(self.goal):
+            self.finished[agent] = self.tick
+
+    def validate(self, x, y, codes):
+        """Target cells for moving each (x, y) by direction ``codes``, and which are open"""
+        target_x = x + STEPS_X[codes]
+        target_y = y + STEPS_Y[codes]
+        inside = (target_x >= 0) & (target_x < self.width) & (target_y >= 0) & (target_y < self.height)
+        index = np.where(inside, target_y * self.width + target_x, 0)
+        return target_x, target_y, inside & self.open[index]
+
+    def bot_codes(self, bots):
+        """Direction codes for ``bots``: downhill on the distance field, or a random slip"""
+        x = self.x[bots, None]
+        y = self.y[bots, None]
+        codes = np.arange(4)
+        target_x, target_y, valid = self.validate(x, y, codes)
+        index = np.where(valid, target_y * self.width + target_x, 0)
+        distances = np.where(valid, self.distances[index], UNREACHABLE)
+        best = distances.argmin(axis=1)
+
+        slips = self.rng.random(len(bots)) >= self.skill[bots]
+        return np.where(slips, self.rng.integers(0, 4, len(bots)), best)
+
+    def step(self, dt):
+        """Advance every agent by one tick of ``dt`` seconds; returns the indices that moved"""
+        self.tick += 1
+        racing = self.finished < 0
+
+        # Bots bank time and spend one move per whole move earned
+        self.budget += np.where(self.bot & racing, self.rate * dt, 0.0)
+        ready = np.flatnonzero(self.bot & racing & (self.budget >= 1.0))
+        self.budget[ready] -= 1.0
+
+        driven = np.flatnonzero(~self.bot & racing & (self.intent >= 0))
+        agents = np.concatenate([ready, driven])
+        if not len(agents):
+            return agents
+        codes = np.concatenate([self.bot_codes(ready), self.intent[driven]])
+        self.intent[driven] = -1
+
+        target_x, target_y, valid = self.validate(self.x[agents], self.y[agents], codes)
+        moved = agents[valid]
+        self.x[moved] = target_x[valid]
+        self.y[moved] = target_y[valid]
+        self.moves[moved] += 1
+
+        arrived = moved[(self.x[moved] == self.goal[0]) & (self.y[moved] == self.goal[1])]
+        self.finished[arrived] = self.tick
+        return moved
+
+    def occupied(self, left, top, columns, rows, bots_only=False):
+        """Distinct ``(x, y)`` cells holding an agent (or a bot) inside the given window"""
+        inside = ((self.x >= left) & (self.x < left + columns) &
+                  (self.y >= top) & (self.y < top + rows))
+        if bots_only:
+            inside &= self.bot
+        index = np.unique(self.y[inside].astype(np.int64) * self.width + self.x[inside])
+        return set(zip((index % self.width).tolist(), (index // self.width).tolist()))
+
+    def standings(self):
+        """Indices of finished agents, first home first"""
+        done = np.flatnonzero(self.finished >= 0)
+        return done[np.argsort(self.finished[done], kind="stable")]
+
+    def rank(self, agent):
+        """1-based finishing place of ``agent``, or None while it is still racing"""
+        places = np.flatnonzero(self.standings() == agent)
+        return int(places[0]) + 1 if len(places) else None
+
+    def bots_racing(self):
+        """Whether any bot has yet to reach the goal"""
+        return bool((self.bot & (self.finished < 0)).any())
+
+    def bots_home(self):
+        return int(np.count_nonzero(self.bot & (self.finished >= 0)))
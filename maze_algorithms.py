@@ -0,0 +1,366 @@
+"""Maze carving algorithms and the registry used by MazeGenerator.
+
+Every algorithm carves a perfect maze into a ``MazeGrid`` that starts out as
+solid wall. Rooms sit at odd coordinates and carving a room, or the wall
+between two rooms, sets that cell to ``PATH``. An algorithm is called with
+the grid and a random source with the ``random.Random`` interface.
+
+Complexities use R for the number of rooms (about width * height / 4) and
+W for the number of rooms in one row.
+"""
+from array import array
+
+from maze_grid import PATH
+
+ALGORITHMS = {}
+
+
+def register_algorithm(name):
+    """Decorator that adds a carving function to ``ALGORITHMS`` under ``name``"""
+    def decorator(func):
+        ALGORITHMS[name] = func
+        return func
+    return decorator
+
+
+def get_algorithm(name):
+    """Look up a registered carving function by name"""
+    try:
+        return ALGORITHMS[name]
+    except KeyError:
+        raise ValueError(f"unknown maze algorithm {name!r}, "
+                         f"expected one of {', '.join(sorted(ALGORITHMS))}") from None
+
+
+def room_counts(grid):
+    """Number of rooms across and down the grid"""
+    return (grid.width - 1) // 2, (grid.height - 1) // 2
+
+
+def open_rooms(grid):
+    """Carve every room cell, leaving all walls between rooms standing"""
+    rooms_x, rooms_y = room_counts(grid)
+    width = grid.width
+    for ry in range(rooms_y):
+        start = (2 * ry + 1) * width + 1
+        grid.cells[start:start + 2 * rooms_x:2] = bytes(rooms_x)
+
+
+@register_algorithm("dfs")
+def dfs(grid, rng):
+    """Randomized depth-first search (recursive backtracker).
+
+    O(R) time. Visited rooms live in a bit-packed set that also marks the
+    border, so neighbour tests need no bounds checks. Each room stores the
+    direction it was entered from in its own cell byte in place of a stack,
+    so extra memory is one bit per cell. Long winding corridors with few,
+    short dead ends.
+    """
+    width = grid.width
+    height = grid.height
+    cells = grid.cells
+
+    # Bit i + bias of `visited` covers cell i; the bias keeps the rows
+    # just above and below the grid addressable
+    bias = 2 * width
+    visited = bytearray(((height + 4) * width + 7) >> 3)
+
+    def mark(index):
+        visited[index >> 3] |= 1 << (index & 7)
+
+    # Border rows (and the padding beyond them) and border columns count
+    # as visited, so the carver never steps outside the maze
+    for index in range(3 * width):
+        mark(index)
+        mark((height + 1) * width + index)
+    for y in range(height):
+        mark(bias + y * width)
+        mark(bias + y * width + width - 1)
+
+    # Direction k: offset to the next room and to the wall between them
+    room_steps = (2, 2 * width, -2, -2 * width)
+    wall_steps = (1, width, -1, -width)
+    options = tuple(tuple(k for k in range(4) if mask >> k & 1) for mask in range(16))
+    rand = rng.random
+
+    start = 1 * width + 1
+    current = start
+    mark(current + bias)
+    cells[current] = 2  # entered "from" itself; 2 + k marks the direction k
+
+    right, down, left, up = room_steps
+    while True:
+        bit = current + bias
+        mask = 0
+        n = bit + right
+        if not visited[n >> 3] >> (n & 7) & 1:
+            mask = 1
+        n = bit + down
+        if not visited[n >> 3] >> (n & 7) & 1:
+            mask |= 2
+        n = bit + left
+        if not visited[n >> 3] >> (n & 7) & 1:
+            mask |= 4
+        n = bit + up
+        if not visited[n >> 3] >> (n & 7) & 1:
+            mask |= 8
+
+        if mask:
+            choices = options[mask]
+            k = choices[int(rand() * len(choices))]
+            # Remove the wall between current and next cell
+            cells[current + wall_steps[k]] = PATH
+            current += room_steps[k]
+            n = current + bias
+            visited[n >> 3] |= 1 << (n & 7)
+            cells[current] = 2 + k
+        else:
+            # Backtrack along the recorded entry direction
+            k = cells[current] - 2
+            cells[current] = PATH
+            if current == start:
+                break
+            current -= room_steps[k]
+
+
+@register_algorithm("kruskal")
+def kruskal(grid, rng):
+    """Randomized Kruskal: knock down shuffled walls that join two trees.
+
+    O(R α(R)) time with an array-based union-find (union by rank, path
+    halving). Memory is O(R): 8 bytes per room for parents, 1 for ranks and
+    8 per candidate wall. Many short dead ends and frequent branching.
+    """
+    width = grid.width
+    cells = grid.cells
+    rooms_x, rooms_y = room_counts(grid)
+    count = rooms_x * rooms_y
+    open_rooms(grid)
+
+    # Edge e joins room e >> 1 to its right (e even) or lower (e odd) neighbour
+    edges = array("q")
+    for ry in range(rooms_y):
+        row = ry * rooms_x
+        for r in range(row, row + rooms_x - 1):
+            edges.append(r << 1)
+        if ry + 1 < rooms_y:
+            for r in range(row, row + rooms_x):
+                edges.append(r << 1 | 1)
+    rng.shuffle(edges)
+
+    parent = array("q", range(count))
+    rank = bytearray(count)
+
+    def find(r):
+        while parent[r] != r:
+            parent[r] = parent[parent[r]]
+            r = parent[r]
+        return r
+
+    remaining = count - 1
+    for edge in edges:
+        if not remaining:
+            break
+        r = edge >> 1
+        down = edge & 1
+        a = find(r)
+        b = find(r + rooms_x if down else r + 1)
+        if a == b:
+            continue
+
+        if rank[a] < rank[b]:
+            a, b = b, a
+        parent[b] = a
+        if rank[a] == rank[b]:
+            rank[a] += 1
+
+        ry, rx = divmod(r, rooms_x)
+        cell = (2 * ry + 1) * width + 2 * rx + 1
+        cells[cell + width if down else cell + 1] = PATH
+        remaining -= 1
+
+
+@register_algorithm("wilson")
+def wilson(grid, rng):
+    """Wilson's algorithm: loop-erased random walks into a growing tree.
+
+    Samples uniformly from all spanning trees, so the texture has no
+    directional bias. Expected time is the total hitting time of the walks,
+    about O(R log R) on a grid; the first walks are the slowest. Memory is
+    two bytes per room (tree membership and last exit direction).
+    """
+    width = grid.width
+    cells = grid.cells
+    rooms_x, rooms_y = room_counts(grid)
+    count = rooms_x * rooms_y
+
+    in_tree = bytearray(count)
+    exits = bytearray(count)
+    room_steps = (1, rooms_x, -1, -rooms_x)
+    wall_steps = (1, width, -1, -width)
+    randrange = rng.randrange
+
+    root = randrange(count)
+    in_tree[root] = 1
+    ry, rx = divmod(root, rooms_x)
+    cells[(2 * ry + 1) * width + 2 * rx + 1] = PATH
+
+    for start in range(count):
+        if in_tree[start]:
+            continue
+
+        # Random walk until the tree is hit; revisiting a room overwrites
+        # its exit, which erases the loop
+        r = start
+        while not in_tree[r]:
+            ry, rx = divmod(r, rooms_x)
+            while True:
+                k = randrange(4)
+                if ((k == 0 and rx + 1 < rooms_x) or (k == 1 and ry + 1 < rooms_y) or
+                        (k == 2 and rx > 0) or (k == 3 and ry > 0)):
+                    break
+            exits[r] = k
+            r += room_steps[k]
+
+        # Follow the loop-erased path and add it to the tree
+        r = start
+        while not in_tree[r]:
+            in_tree[r] = 1
+            k = exits[r]
+            ry, rx = divmod(r, rooms_x)
+            cell = (2 * ry + 1) * width + 2 * rx + 1
+            cells[cell] = PATH
+            cells[cell + wall_steps[k]] = PATH
+            r += room_steps[k]
+
+
+def eller_rows(rooms_x, rooms_y, rng):
+    """Yield ``(east, south)`` passage flags for each row of an Eller maze.
+
+    ``east[x]`` opens the wall between rooms x and x + 1 and ``south[x]``
+    the wall below room x. Only the current row's set labels are kept, so
+    callers can stream rows without holding the maze in memory.
+    """
+    labels = list(range(rooms_x))
+
+    for ry in range(rooms_y):
+        last = ry == rooms_y - 1
+        parent = list(range(rooms_x))
+
+        def find(label):
+            while parent[label] != label:
+                parent[label] = parent[parent[label]]
+                label = parent[label]
+            return label
+
+        # Randomly join neighbours from different sets; the last row joins
+        # every remaining set so the maze is connected
+        east = bytearray(rooms_x)
+        for x in range(rooms_x - 1):
+            a, b = find(labels[x]), find(labels[x + 1])
+            if a != b and (last or rng.random() < 0.5):
+                parent[a] = b
+                east[x] = 1
+
+        south = bytearray(rooms_x)
+        if not last:
+            # Every set continues down through at least one room
+            members = {}
+            for x in range(rooms_x):
+                members.setdefault(find(labels[x]), []).append(x)
+            for group in members.values():
+                keep = rng.choice(group)
+                for x in group:
+                    if x == keep or rng.random() < 0.5:
+                        south[x] = 1
+
+            # Relabel into 0..rooms_x - 1 for the next row: rooms below an
+            # opening inherit their set, the rest start a new one
+            remap = {}
+            carried = [remap.setdefault(find(labels[x]), len(remap)) if south[x] else -1
+                       for x in range(rooms_x)]
+            fresh = len(remap)
+            for x in range(rooms_x):
+                if carried[x] < 0:
+                    carried[x] = fresh
+                    fresh += 1
+            labels = carried
+
+        yield east, south
+
+
+@register_algorithm("eller")
+def eller(grid, rng):
+    """Eller's algorithm: builds the maze one row at a time.
+
+    O(R α(W)) time. Only one row of set labels is live, so extra memory is
+    O(W) whatever the height. Mostly horizontal passages with short
+    vertical links.
+    """
+    width = grid.width
+    cells = grid.cells
+    rooms_x, rooms_y = room_counts(grid)
+    open_rooms(grid)
+
+    for ry, (east, south) in enumerate(eller_rows(rooms_x, rooms_y, rng)):
+        row = (2 * ry + 1) * width + 1
+        for rx in range(rooms_x):
+            if east[rx]:
+                cells[row + 2 * rx + 1] = PATH
+            if south[rx]:
+                cells[row + 2 * rx + width] = PATH
+
+
+@register_algorithm("binary_tree")
+def binary_tree(grid, rng):
+    """Binary tree: every room opens north or west at random.
+
+    O(R) time and O(1) extra memory, and each room is decided on its own.
+    The top row and left column are unbroken corridors and every path
+    drifts diagonally towards the start, so the maze is easy.
+    """
+    width = grid.width
+    cells = grid.cells
+    rooms_x, rooms_y = room_counts(grid)
+    open_rooms(grid)
+    rand = rng.random
+
+    for ry in range(rooms_y):
+        row = (2 * ry + 1) * width + 1
+        for rx in range(rooms_x):
+            cell = row + 2 * rx
+            if ry and (not rx or rand() < 0.5):
+                cells[cell - width] = PATH  # North
+            elif rx:
+                cells[cell - 1] = PATH  # West
+
+
+@register_algorithm("sidewinder")
+def sidewinder(grid, rng):
+    """Sidewinder: each row is cut into runs that each open one passage north.
+
+    O(R) time and O(1) extra memory. The top row is one corridor and no
+    dead end points downwards, so texture is mostly horizontal runs.
+    """
+    width = grid.width
+    cells = grid.cells
+    rooms_x, rooms_y = room_counts(grid)
+    open_rooms(grid)
+    rand = rng.random
+
+    for ry in range(rooms_y):
+        row = (2 * ry + 1) * width + 1
+        run_start = 0
+        for rx in range(rooms_x):
+            cell = row + 2 * rx
+            at_east_edge = rx + 1 == rooms_x
+            if ry == 0:
+                if not at_east_edge:
+                    cells[cell + 1] = PATH
+            elif at_east_edge or rand() < 0.5:
+                # Close the run by opening north from one of its rooms
+                pick = run_start + int(rand() * (rx - run_start + 1))
+                cells[row + 2 * pick - width] = PATH
+                run_start = rx + 1
+            else:
+                cells[cell + 1] = PATH
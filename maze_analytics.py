@@ -0,0 +1,176 @@
+"""Vectorized metrics for batches of mazes, for level design and seed picking.
+
+Mazes of one size are stacked into a ``(count, height, width)`` boolean
+array of open cells and every metric is computed with NumPy array
+operations over the whole batch at once; there are no per-cell Python
+loops. NumPy is only needed for this module, not for the game.
+
+Metrics, one array entry per maze:
+
+``dead_ends``
+    open cells with a single open neighbour
+``dead_end_ratio``
+    dead ends as a fraction of rooms (open cells at odd x and y)
+``junctions``
+    open cells with three or more open neighbours
+``longest_corridor``
+    longest straight horizontal or vertical run of open cells
+``solution_length``
+    moves from start to end, -1 when the end cannot be reached
+``tortuosity``
+    solution length over the Manhattan distance from start to end
+``turns``
+    changes of direction along the solution
+
+Solutions come from dead-end filling, which is exact for perfect mazes
+(every built-in algorithm). Loops are left in place and counted as part
+of the solution.
+"""
+import numpy as np
+
+from maze_core import MazeGenerator
+from maze_grid import PATH
+
+METRICS = ("dead_ends", "dead_end_ratio", "junctions", "longest_corridor",
+           "solution_length", "tortuosity", "turns")
+
+
+def as_batch(grids):
+    """Stack same-sized ``MazeGrid`` objects into a boolean open-cell array"""
+    grids = list(grids)
+    width, height = grids[0].width, grids[0].height
+    if any(grid.width != width or grid.height != height for grid in grids):
+        raise ValueError("every maze in a batch must have the same size")
+    cells = np.frombuffer(b"".join(bytes(grid.cells) for grid in grids), dtype=np.uint8)
+    return cells.reshape(len(grids), height, width) == PATH
+
+
+def neighbour_counts(open_cells):
+    """Open neighbours of every cell of a batch padded with a wall border"""
+    counts = np.zeros(open_cells.shape, dtype=np.uint8)
+    inner = counts[:, 1:-1, 1:-1]
+    inner += open_cells[:, :-2, 1:-1]
+    inner += open_cells[:, 2:, 1:-1]
+    inner += open_cells[:, 1:-1, :-2]
+    inner += open_cells[:, 1:-1, 2:]
+    return counts
+
+
+def fill_dead_ends(open_cells, keep):
+    """Wall up dead ends, except ``keep`` cells, until none are left.
+
+    ``open_cells`` must have a closed border. Only the cells next to the
+    tips removed in one pass can become tips in the next, so each pass
+    works on that frontier of flat indices rather than the whole batch,
+    and the total work is proportional to the number of cells filled.
+    """
+    shape = open_cells.shape
+    cells = open_cells.ravel().copy()
+    degree = neighbour_counts(open_cells).ravel().astype(np.int16)
+    keep = np.broadcast_to(keep, shape).ravel()
+    offsets = np.array([-1, 1, -shape[2], shape[2]])
+
+    tips = np.flatnonzero(cells & (degree <= 1) & ~keep)
+    while tips.size:
+        cells[tips] = False
+        neighbours = (tips[:, None] + offsets).ravel()
+        neighbours = neighbours[cells[neighbours]]
+        # A cell next to two removed tips loses two neighbours
+        np.subtract.at(degree, neighbours, 1)
+        candidates = np.unique(neighbours)
+        tips = candidates[(degree[candidates] <= 1) & ~keep[candidates]]
+    return cells.reshape(shape)
+
+
+def longest_runs(open_cells):
+    """Longest run of consecutive open cells along the last axis, per maze"""
+    count, rows, columns = open_cells.shape
+    # A closed cell after every row stops runs from joining across rows
+    padded = np.zeros((count, rows, columns + 2), dtype=np.int8)
+    padded[:, :, 1:-1] = open_cells
+    steps = np.diff(padded.ravel())
+    starts = np.flatnonzero(steps == 1)
+    ends = np.flatnonzero(steps == -1)
+
+    longest = np.zeros(count, dtype=np.int64)
+    np.maximum.at(longest, starts // (rows * (columns + 2)), ends - starts)
+    return longest
+
+
+def analyze(grids, start=(1, 1), end=None):
+    """Metrics for a batch of same-sized mazes as a dict of arrays.
+
+    ``grids`` is a sequence of ``MazeGrid`` objects or a boolean array
+    from ``as_batch``. ``end`` defaults to the bottom-right room, where
+    ``MazeGenerator`` puts the exit.
+    """
+    open_cells = grids if isinstance(grids, np.ndarray) else as_batch(grids)
+    count, height, width = open_cells.shape
+    if end is None:
+        end = (width - 2, height - 2)
+
+    # One wall of padding lets every neighbour lookup use plain slices
+    padded = np.zeros((count, height + 2, width + 2), dtype=bool)
+    padded[:, 1:-1, 1:-1] = open_cells
+    degree = neighbour_counts(padded)
+
+    dead_ends = np.count_nonzero(padded & (degree == 1), axis=(1, 2))
+    junctions = np.count_nonzero(padded & (degree >= 3), axis=(1, 2))
+    rooms = np.count_nonzero(open_cells[:, 1::2, 1::2], axis=(1, 2))
+    longest = np.maximum(longest_runs(open_cells), longest_runs(open_cells.transpose(0, 2, 1)))
+
+    keep = np.zeros(padded.shape[1:], dtype=bool)
+    keep[start[1] + 1, start[0] + 1] = keep[end[1] + 1, end[0] + 1] = True
+    solution = fill_dead_ends(padded, keep)
+    solution_degree = neighbour_counts(solution)
+    reached = solution_degree[:, end[1] + 1, end[0] + 1] > 0
+    if start == end:
+        reached = padded[:, start[1] + 1, start[0] + 1]
+    length = np.where(reached, np.count_nonzero(solution, axis=(1, 2)) - 1, -1)
+
+    horizontal = solution[:, 1:-1, :-2] | solution[:, 1:-1, 2:]
+    vertical = solution[:, :-2, 1:-1] | solution[:, 2:, 1:-1]
+    turns = np.count_nonzero(solution[:, 1:-1, 1:-1] & horizontal & vertical, axis=(1, 2))
+
+    distance = abs(end[0] - start[0]) + abs(end[1] - start[1])
+    return {
+        "dead_ends": dead_ends,
+        "dead_end_ratio": dead_ends / np.maximum(rooms, 1),
+        "junctions": junctions,
+        "longest_corridor": longest,
+        "solution_length": length,
+        "tortuosity": np.where(reached, length / max(distance, 1), np.nan),
+        "turns": np.where(reached, turns, 0),
+    }
+
+
+def analyze_maze(grid, start=(1, 1), end=None):
+    """Metrics for a single maze as plain Python numbers"""
+    return {name: values[0].item() for name, values in analyze([grid], start, end).items()}
+
+
+def analyze_seeds(seeds, size, algorithm="dfs", batch_size=1024):
+    """Generate and analyze one ``size`` x ``size`` maze per seed.
+
+    Returns the metric arrays plus ``seed``, in the order given. Mazes
+    are generated and analyzed ``batch_size`` at a time to bound memory.
+    """
+    seeds = np.asarray(seeds, dtype=np.uint64)
+    batches = []
+    for first in range(0, len(seeds), batch_size):
+        grids = [MazeGenerator(size, size, algorithm, int(seed)).generate_maze()
+                 for seed in seeds[first:first + batch_size]]
+        batches.append(analyze(grids))
+
+    metrics = {name: np.concatenate([batch[name] for batch in batches]) for name in METRICS}
+    metrics["seed"] = seeds
+    return metrics
+
+
+def best_seeds(metrics, count, by="tortuosity", highest=True):
+    """The ``count`` seeds that rank best on metric ``by``"""
+    values = metrics[by]
+    order = np.argsort(-values if highest else values, kind="stable")
+    # Unsolvable mazes have NaN tortuosity; never pick them
+    order = order[~np.isnan(values[order].astype(float))]
+    return metrics["seed"][order[:count]].tolist()
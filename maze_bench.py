@@ -0,0 +1,352 @@
+"""Headless benchmarks for generation, solving, movement and rendering.
+
+Run ``python maze_bench.py`` for the default sizes, ``--full`` to go up to
+4001 x 4001, and ``--json results.json`` to keep the results. Every
+result is a record with a name such as ``generate.dfs.101``, a metric, a
+value and whether lower or higher is better. ``--baseline`` compares the
+run against a stored result file and exits with status 1 if any shared
+record got worse by more than ``--tolerance``. Sizes below
+``--gate-min-size`` are still reported but never fail the comparison:
+their timings are too short to compare reliably. ``--save-baseline``
+writes the run as the new baseline. ``--runs`` repeats the whole suite and
+keeps the median of each record. A baseline saved from a single lucky run
+would make every later check fail, so saving defaults to three runs. Cases
+that fail the check are measured once more, and only fail if the retry is
+also too slow.
+
+Peak memory is measured with ``tracemalloc``, which slows generation down
+roughly thirtyfold, so it is only traced up to ``--trace-max-size``.
+Rendering runs ``Game.draw_maze`` under the SDL dummy video driver and is
+skipped when pygame is not installed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from maze_algorithms import ALGORITHMS
+from maze_core import Level, MazeGenerator, Player
+from maze_solver import SOLVERS, DistanceField
+
+DEFAULT_SIZES = (15, 101, 501)
+FULL_SIZES = (15, 101, 501, 1001, 2001, 4001)
+DEFAULT_SEEDS = (1, 2)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maze_bench_baseline.json")
+MOVES = 100_000
+FRAMES = 60
+TRACE_MAX_SIZE = 1001
+# Fast cases are looped until one sample takes at least this long, which
+# keeps sub-millisecond timings stable enough to compare
+MIN_SAMPLE_SECONDS = 0.05
+# Smaller sizes stay too noisy for a regression gate even when looped
+GATE_MIN_SIZE = 101
+
+
+def record(name, metric, value, unit, better="lower"):
+    return {"name": name, "metric": metric, "value": value, "unit": unit, "better": better}
+
+
+def timed(func, repeat):
+    """Best seconds per call over ``repeat`` samples, and the last result.
+
+    The minimum is kept rather than the mean: slower samples measure other
+    load on the machine, not the code.
+    """
+    started = time.perf_counter()
+    result = func()
+    first = time.perf_counter() - started
+    loops = max(1, int(MIN_SAMPLE_SECONDS / first)) if first else 1000
+
+    # A first call that was long enough already counts as a sample
+    times = [first] if loops == 1 else []
+    while len(times) < repeat:
+        started = time.perf_counter()
+        for _ in range(loops):
+            result = func()
+        times.append((time.perf_counter() - started) / loops)
+    return min(times), result
+
+
+def peak_memory(func):
+    """Peak bytes allocated through Python while ``func`` runs"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_generation(algorithm, size, seeds, repeat, trace=True):
+    """Time and trace generation, returning the records and one maze per seed"""
+    times = []
+    mazes = []
+    for seed in seeds:
+        seconds, maze = timed(lambda: MazeGenerator(size, size, algorithm, seed).generate_maze(), repeat)
+        times.append(seconds)
+        mazes.append(maze)
+
+    name = f"generate.{algorithm}.{size}"
+    records = [record(name, "cells_per_second", size * size / statistics.median(times), "cells/s", "higher")]
+    if trace:
+        # Tracing is slow and the peak barely depends on the seed, so trace once
+        peak = peak_memory(lambda: MazeGenerator(size, size, algorithm, seeds[0]).generate_maze())
+        records.append(record(name, "peak_bytes", peak, "B"))
+    return records, mazes
+
+
+def bench_solvers(algorithm, size, mazes, repeat):
+    records = []
+    start = (1, 1)
+    goal = (size - 2, size - 2)
+    solvers = dict(SOLVERS, distance_field=lambda grid, start, goal: DistanceField(grid, goal))
+    for solver_name, solver in solvers.items():
+        times = [timed(lambda: solver(maze, start, goal), repeat)[0] for maze in mazes]
+        records.append(record(f"solve.{solver_name}.{algorithm}.{size}", "seconds",
+                              statistics.median(times), "s"))
+    return records
+
+
+def bench_moves(algorithm, size, mazes, repeat):
+    """Random-walk ``MOVES`` calls to ``Player.move`` on each maze"""
+    rng = random.Random(0)
+    steps = [rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1))) for _ in range(MOVES)]
+
+    def walk(maze):
+        player = Player(1, 1)
+        move = player.move
+        for dx, dy in steps:
+            move(dx, dy, maze)
+
+    times = [timed(lambda: walk(maze), repeat)[0] for maze in mazes]
+    return [record(f"move.{algorithm}.{size}", "moves_per_second",
+                   MOVES / statistics.median(times), "moves/s", "higher")]
+
+
+class RenderBench:
+    """A headless ``Game`` for timing ``draw_maze``"""
+
+    def __init__(self):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        import maze_escape
+        self.game = maze_escape.Game()
+        # Background level building (and solving, for levels without a
+        # distance field) would only add noise here
+        self.game.prefetcher.shutdown()
+        self.game.prefetcher = None
+
+    def run(self, algorithm, size, mazes, repeat):
+        game = self.game
+        cached = []
+        rerendered = []
+        for maze in mazes:
+            game.start_level(Level(maze, (algorithm, size, None), end=(size - 2, size - 2)))
+            cached.append(timed(lambda: [game.draw_maze() for _ in range(FRAMES)], repeat)[0] / FRAMES)
+
+            def scroll():
+                # Moving the camera forces the visible cells to be re-rendered
+                for _ in range(FRAMES):
+                    game.camera_x = None
+                    game.update_camera()
+                    game.draw_maze()
+            rerendered.append(timed(scroll, repeat)[0] / FRAMES)
+
+        name = f"draw.{algorithm}.{size}"
+        return [
+            record(name, "frame_seconds", statistics.median(cached), "s"),
+            record(name, "rerender_frame_seconds", statistics.median(rerendered), "s"),
+        ]
+
+    def close(self):
+        import pygame
+        pygame.quit()
+
+
+def run_benchmarks(sizes, algorithms, seeds, repeat=3, render=True, trace_max_size=TRACE_MAX_SIZE,
+                   log=None):
+    """Run every benchmark and return the list of result records"""
+    renderer = None
+    if render:
+        try:
+            renderer = RenderBench()
+        except ImportError:
+            if log:
+                log("pygame is not installed; skipping render benchmarks")
+
+    records = []
+    try:
+        for size in sizes:
+            for algorithm in algorithms:
+                started = time.perf_counter()
+                results, mazes = bench_generation(algorithm, size, seeds, repeat,
+                                                  trace=size <= trace_max_size)
+                results += bench_solvers(algorithm, size, mazes, repeat)
+                results += bench_moves(algorithm, size, mazes, repeat)
+                if renderer is not None:
+                    results += renderer.run(algorithm, size, mazes, repeat)
+                records += results
+                if log:
+                    log(f"{algorithm:>12} {size:>5}  {time.perf_counter() - started:7.2f}s")
+    finally:
+        if renderer is not None:
+            renderer.close()
+    return records
+
+
+def record_size(entry):
+    """Maze size of a record; every record name ends in ``.<size>``"""
+    return int(entry["name"].rsplit(".", 1)[1])
+
+
+def median_records(runs):
+    """Merge several runs of the same suite into one, taking each record's median value"""
+    values = {}
+    for records in runs:
+        for entry in records:
+            values.setdefault((entry["name"], entry["metric"]), []).append(entry["value"])
+    return [dict(entry, value=statistics.median(values[entry["name"], entry["metric"]]))
+            for entry in runs[0]]
+
+
+def best_records(records, retried):
+    """``records`` with each value replaced by the better of it and its retried value"""
+    again = {(entry["name"], entry["metric"]): entry["value"] for entry in retried}
+    merged = []
+    for entry in records:
+        value = again.get((entry["name"], entry["metric"]), entry["value"])
+        best = min if entry["better"] == "lower" else max
+        merged.append(dict(entry, value=best(entry["value"], value)))
+    return merged
+
+
+def compare(records, baseline, tolerance, min_size=GATE_MIN_SIZE):
+    """Records that got worse than ``baseline`` by more than ``tolerance``.
+
+    Returns ``(record, baseline_value, change)`` triples, where ``change``
+    is the fractional slowdown (or growth, for memory) over the baseline.
+    Records missing from either side, or for sizes below ``min_size``,
+    are ignored.
+    """
+    previous = {(entry["name"], entry["metric"]): entry["value"] for entry in baseline["results"]}
+    regressions = []
+    for entry in records:
+        if record_size(entry) < min_size:
+            continue
+        old = previous.get((entry["name"], entry["metric"]))
+        if not old or not entry["value"]:
+            continue
+        if entry["better"] == "lower":
+            change = entry["value"] / old - 1
+        else:
+            change = old / entry["value"] - 1
+        if change > tolerance:
+            regressions.append((entry, old, change))
+    return regressions
+
+
+def write_results(path, records):
+    document = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": records,
+    }
+    with open(path, "w") as stream:
+        json.dump(document, stream, indent=1)
+        stream.write("\n")
+
+
+def parse_list(text, convert=str):
+    return tuple(convert(item) for item in text.split(",") if item)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=lambda text: parse_list(text, int),
+                        help=f"comma-separated odd maze sizes (default {DEFAULT_SIZES})")
+    parser.add_argument("--full", action="store_true", help=f"use sizes {FULL_SIZES}")
+    parser.add_argument("--algorithms", type=parse_list, default=tuple(ALGORITHMS),
+                        help="comma-separated algorithms (default: all)")
+    parser.add_argument("--seeds", type=lambda text: parse_list(text, int), default=DEFAULT_SEEDS)
+    parser.add_argument("--repeat", type=int, default=3, help="timed samples per case; the fastest is kept")
+    parser.add_argument("--runs", type=int,
+                        help="whole-suite runs, merged by median (default 3 with --save-baseline, else 1)")
+    parser.add_argument("--no-render", action="store_true", help="skip the draw_maze benchmarks")
+    parser.add_argument("--trace-max-size", type=int, default=TRACE_MAX_SIZE,
+                        help=f"largest size whose peak memory is traced (default {TRACE_MAX_SIZE})")
+    parser.add_argument("--json", metavar="PATH", help="write the results to PATH")
+    parser.add_argument("--baseline", metavar="PATH", nargs="?", const=DEFAULT_BASELINE,
+                        help="compare against PATH (default maze_bench_baseline.json)")
+    parser.add_argument("--save-baseline", metavar="PATH", nargs="?", const=DEFAULT_BASELINE,
+                        help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed fractional regression before failing (default 0.5)")
+    parser.add_argument("--gate-min-size", type=int, default=GATE_MIN_SIZE,
+                        help=f"smallest size checked against the baseline (default {GATE_MIN_SIZE})")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (FULL_SIZES if args.full else DEFAULT_SIZES)
+    for algorithm in args.algorithms:
+        if algorithm not in ALGORITHMS:
+            parser.error(f"unknown algorithm {algorithm!r}; choose from {', '.join(ALGORITHMS)}")
+    for size in sizes:
+        if size < 5 or size % 2 == 0:
+            parser.error(f"size {size} must be an odd number of at least 5")
+
+    # Read the baseline first, so a missing file fails before the long run
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline) as stream:
+                baseline = json.load(stream)
+        except (OSError, ValueError) as error:
+            parser.error(f"cannot read baseline {args.baseline}: {error}")
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    runs = args.runs if args.runs is not None else (3 if args.save_baseline else 1)
+    if runs < 1:
+        parser.error("--runs must be positive")
+    records = median_records([
+        run_benchmarks(sizes, args.algorithms, args.seeds, args.repeat, render=not args.no_render,
+                       trace_max_size=args.trace_max_size, log=log)
+        for _ in range(runs)])
+    if args.json:
+        write_results(args.json, records)
+    if args.save_baseline:
+        write_results(args.save_baseline, records)
+    if not args.json:
+        json.dump(records, sys.stdout, indent=1)
+        print()
+
+    if baseline is not None:
+        regressions = compare(records, baseline, args.tolerance, args.gate_min_size)
+        if regressions:
+            # A slow spell on the machine can fail a healthy case, so only
+            # regressions that reproduce when measured again count
+            cases = sorted({(record_size(entry), entry["name"].split(".")[-2]) for entry, _, _ in regressions})
+            log(f"re-measuring {len(cases)} flagged case(s)")
+            retried = []
+            for size, algorithm in cases:
+                retried += run_benchmarks([size], [algorithm], args.seeds, args.repeat, render=not args.no_render,
+                                          trace_max_size=args.trace_max_size)
+            regressions = compare(best_records(records, retried), baseline, args.tolerance, args.gate_min_size)
+        for entry, old, change in regressions:
+            log(f"REGRESSION {entry['name']} {entry['metric']}: "
+                f"{old:.4g} -> {entry['value']:.4g} {entry['unit']} ({change:+.0%})")
+        if regressions:
+            return 1
+        log(f"no regressions beyond {args.tolerance:.0%} against {args.baseline} "
+            f"(sizes {args.gate_min_size} and up)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,432 @@
+"""Headless simulation core for Maze Escape.
+
+Maze generation, player movement, win detection and scoring live here so
+they can be used without importing pygame or opening a display.
+"""
+import bisect
+import random
+import time
+from enum import Enum
+
+from maze_algorithms import ALGORITHMS, get_algorithm
+from maze_fog import FogOfWar
+from maze_grid import PATH, MazeGrid
+from maze_solver import DistanceField
+from maze_stream import InfiniteMaze
+
+
+class GameState(Enum):
+    MENU = 1
+    PLAYING = 2
+    GAME_OVER = 3
+    PAUSE = 4
+    CREDITS = 5
+
+
+class Difficulty:
+    EASY = {"size": 15, "name": "Easy", "algorithm": "dfs"}
+    MEDIUM = {"size": 25, "name": "Medium", "algorithm": "dfs"}
+    HARD = {"size": 35, "name": "Hard", "algorithm": "dfs"}
+    # Corridor `size` cells wide that is generated tile by tile as the player descends
+    ENDLESS = {"size": 31, "name": "Endless", "algorithm": "eller", "endless": True}
+
+    PRESETS = (EASY, MEDIUM, HARD, ENDLESS)
+
+    @staticmethod
+    def with_algorithm(preset, algorithm):
+        """Copy of ``preset`` that generates its mazes with ``algorithm``
+
+        Endless corridors are always carved row by row with Eller's
+        algorithm, so endless presets keep ``"eller"``.
+        """
+        get_algorithm(algorithm)
+        if preset.get("endless"):
+            return dict(preset)
+        return dict(preset, algorithm=algorithm)
+
+    @staticmethod
+    def for_level(size, algorithm):
+        """The preset a ``size`` x ``size`` maze file is scored under, or None.
+
+        Maze files can hold any size; only the preset sizes are ranked.
+        """
+        if algorithm not in ALGORITHMS:
+            return None
+        for preset in Difficulty.PRESETS:
+            if preset["size"] == size and not preset.get("endless"):
+                return Difficulty.with_algorithm(preset, algorithm)
+        return None
+
+    @staticmethod
+    def algorithms():
+        """Names of all registered maze algorithms"""
+        return list(ALGORITHMS)
+
+
+# Move directions as (dx, dy), indexed by the 2-bit codes used in input logs
+DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+
+def new_seed():
+    """A fresh random 32-bit maze seed"""
+    return random.getrandbits(32)
+
+
+class MazeGenerator:
+    """Carves a maze that is fully determined by ``(algorithm, size, seed)``.
+
+    Each generator draws from its own ``random.Random(seed)``, so the global
+    ``random`` state neither affects nor is affected by generation. A seed
+    is picked at random when none is given.
+    """
+
+    def __init__(self, width, height, algorithm="dfs", seed=None):
+        self.width = width
+        self.height = height
+        self.algorithm = algorithm
+        self.carve = get_algorithm(algorithm)
+        self.seed = new_seed() if seed is None else seed
+        self._rng = random.Random(self.seed)
+        self.maze = MazeGrid(width, height)
+
+    def generate_maze(self):
+        """Generate maze using the configured algorithm (DFS by default)"""
+        self.carve(self.maze, self._rng)
+
+        # Ensure start and end are open
+        cells = self.maze.cells
+        cells[1 * self.width + 1] = PATH  # Start
+        cells[(self.height - 2) * self.width + self.width - 2] = PATH  # End
+
+        return self.maze
+
+
+class Player:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def move(self, dx, dy, maze):
+        new_x = self.x + dx
+        new_y = self.y + dy
+
+        if maze.is_open(new_x, new_y):
+            self.x = new_x
+            self.y = new_y
+            return True
+        return False
+
+
+class HeldDirection:
+    """Auto-repeat for held direction keys, advanced in fixed time steps.
+
+    The first move belongs to the key press itself. After a key has been
+    held for ``delay`` seconds it repeats ``rate`` times per second; a rate
+    of 0 turns repeating off. When several keys are held the latest one
+    wins, and releasing it falls back to the one pressed before.
+    """
+
+    def __init__(self, delay=0.25, rate=15):
+        self.delay = delay
+        self.rate = rate
+        self.held = []
+        self.held_for = 0.0
+        self.next_repeat = delay
+
+    @property
+    def direction(self):
+        """The ``(dx, dy)`` currently repeating, or None"""
+        return self.held[-1] if self.held else None
+
+    def press(self, direction):
+        if direction in self.held:
+            self.held.remove(direction)
+        self.held.append(direction)
+        self.restart()
+
+    def release(self, direction):
+        if direction in self.held:
+            active = direction == self.held[-1]
+            self.held.remove(direction)
+            if active:
+                self.restart()
+
+    def clear(self):
+        self.held.clear()
+
+    def restart(self):
+        self.held_for = 0.0
+        self.next_repeat = self.delay
+
+    def advance(self, seconds):
+        """Move the clock on by ``seconds`` and return how many repeats fell due"""
+        if not self.held or not self.rate:
+            return 0
+        self.held_for += seconds
+        repeats = 0
+        while self.held_for >= self.next_repeat:
+            repeats += 1
+            self.next_repeat += 1 / self.rate
+        return repeats
+
+
+class Level:
+    """A generated maze together with everything precomputed for it.
+
+    ``key`` is the ``(algorithm, size, seed)`` triple that regenerates it.
+    Levels loaded from disk may come without a distance field. The session
+    builds one in the background when it has a prefetcher, or the first
+    time it is needed otherwise.
+    """
+
+    def __init__(self, maze, key, start=(1, 1), end=None, distance_field=None, optimal_moves=None):
+        self.maze = maze
+        self.key = key
+        self.seed = key[2]
+        self.start = start
+        self.end = end
+        self.distance_field = distance_field
+        # Seconds spent on each build step, e.g. {"generate": ..., "solve": ...}
+        self.timings = {}
+        if optimal_moves is None:
+            optimal_moves = distance_field.distance(*start) if distance_field else 0
+        self.optimal_moves = optimal_moves
+
+
+def build_level(difficulty, seed=None):
+    """Generate a maze for ``difficulty`` and precompute its distance field"""
+    size = difficulty["size"]
+    algorithm = difficulty.get("algorithm", "dfs")
+    if seed is None:
+        seed = new_seed()
+
+    if difficulty.get("endless"):
+        # Endless corridors have no exit; tiles are carved as the player descends
+        return Level(InfiniteMaze(size, seed), ("endless", size, seed))
+
+    started = time.perf_counter()
+    generator = MazeGenerator(size, size, algorithm, seed)
+    maze = generator.generate_maze()
+    generated = time.perf_counter()
+
+    end = (maze.width - 2, maze.height - 2)
+    # One linear-time BFS from the exit gives hints and the optimal length
+    distance_field = DistanceField(maze, end)
+    level = Level(maze, (algorithm, size, seed), end=end, distance_field=distance_field)
+    level.timings = {"generate": generated - started, "solve": time.perf_counter() - generated}
+    return level
+
+
+class Leaderboard:
+    """Best results per maze, highest score first.
+
+    Keys identify a maze by ``(algorithm, size, seed)``; each key keeps at
+    most ``size`` entries of ``(score, moves, elapsed)``.
+    """
+
+    def __init__(self, size=10):
+        self.size = size
+        self.entries = {}
+
+    def submit(self, key, score, moves, elapsed):
+        """Record a result and return its 1-based rank, or None if it missed the table"""
+        table = self.entries.setdefault(key, [])
+        # Stored as (-score, moves, elapsed) so bisect keeps the best first
+        entry = (-score, moves, elapsed)
+        position = bisect.bisect_right(table, entry)
+        if position >= self.size:
+            return None
+        table.insert(position, entry)
+        del table[self.size:]
+        return position + 1
+
+    def top(self, key):
+        """Entries for ``key`` as ``(score, moves, elapsed)``, best first"""
+        return [(-score, moves, elapsed) for score, moves, elapsed in self.entries.get(key, [])]
+
+    def best(self, key):
+        """Best score recorded for ``key``, or None"""
+        table = self.entries.get(key)
+        return -table[0][0] if table else None
+
+
+class MazeSession:
+    """State of a single game: the maze, the player and the running score.
+
+    ``now`` returns the current time in seconds; simulations can pass a
+    fake clock to score games without waiting in real time. ``prefetcher``
+    is an optional ``MazePrefetcher`` that builds upcoming levels ahead.
+    Setting ``fog_of_war`` gives each new level a ``FogOfWar`` in ``fog``.
+    Loaded levels whose size matches no preset are ``ranked = False``:
+    they are played but never scored, ranked or replayed.
+    """
+
+    def __init__(self, difficulty=Difficulty.EASY, now=time.time, leaderboard=None, prefetcher=None):
+        self.now = now
+        self.leaderboard = Leaderboard() if leaderboard is None else leaderboard
+        self.prefetcher = prefetcher
+        self.state = GameState.MENU
+        self.difficulty = difficulty
+        self.maze = None
+        self.player = None
+        self.start = (1, 1)
+        self.end = None
+        self.distance_field = None
+        # Future of a distance field being built in the background, or None
+        self.distance_pending = None
+        self.optimal_moves = 0
+        self.level_key = None
+        self.seed = None
+        self.rank = None
+        self.depth = 0
+        self.start_time = 0
+        self.end_time = 0
+        self.score = 0
+        self.ranked = True
+        self.moves = 0
+        # One DIRECTION_CODES entry per attempted move, for replays. Endless
+        # runs cannot be replayed, so they record nothing
+        self.inputs = bytearray()
+        self.fog_of_war = False
+        self.fog = None
+
+    def create_player(self, x, y):
+        """Create the player placed at the start position"""
+        return Player(x, y)
+
+    def generate_new_maze(self, seed=None):
+        """Generate a new maze based on current difficulty
+
+        Passing ``seed`` rebuilds that exact maze. Otherwise a ready level is
+        taken from ``self.prefetcher`` when one is attached, and built
+        synchronously only when there is none.
+        """
+        if seed is None and self.prefetcher and not self.difficulty.get("endless"):
+            level = self.prefetcher.pop(self.difficulty)
+        else:
+            level = build_level(self.difficulty, seed)
+        self.start_level(level)
+
+    def start_loaded_level(self, level):
+        """Start a level read from a maze file, scored under the preset matching its size"""
+        algorithm, size, _ = level.key
+        difficulty = Difficulty.for_level(size, algorithm) if level.maze.height == size else None
+        if difficulty is not None:
+            self.difficulty = difficulty
+        self.start_level(level)
+        self.ranked = difficulty is not None
+
+    def start_level(self, level):
+        """Reset the session to play ``level`` from its start position"""
+        self.maze = level.maze
+        self.start = level.start
+        self.end = level.end
+        self.distance_field = level.distance_field
+        if self.distance_pending is not None:
+            self.distance_pending.cancel()
+        self.distance_pending = None
+        if self.distance_field is None and level.end and self.prefetcher:
+            # Loaded levels start at once; hints and races wait for the field
+            self.distance_pending = self.prefetcher.solve(level.maze, level.end)
+        self.optimal_moves = level.optimal_moves
+        self.level_key = level.key
+        self.seed = level.seed
+
+        # Create player at start position
+        self.player = self.create_player(*self.start)
+        self.depth = self.start[1]
+
+        # Reset game stats
+        self.start_time = self.now()
+        self.end_time = 0
+        self.moves = 0
+        self.score = 0
+        self.ranked = True
+        self.rank = None
+        self.inputs = bytearray()
+
+        self.fog = FogOfWar(level.maze) if self.fog_of_war else None
+        if self.fog:
+            self.fog.reveal(*self.start)
+
+    def move(self, dx, dy):
+        """Move the player by one cell, counting successful moves"""
+        if self.end is not None:
+            self.inputs.append(DIRECTION_CODES[dx, dy])
+        if self.player.move(dx, dy, self.maze):
+            self.moves += 1
+            if self.fog:
+                self.fog.reveal(self.player.x, self.player.y)
+            if self.player.y > self.depth:
+                self.depth = self.player.y
+                if self.end is None:
+                    self.maze.prefetch(self.depth)
+            return True
+        return False
+
+    def get_distance_field(self, wait=True):
+        """The level's distance field, built on first use if the level came without one
+
+        With ``wait=False`` a field still being built in the background
+        gives None instead of blocking.
+        """
+        if self.distance_field is None and self.end:
+            pending = self.distance_pending
+            if pending is not None and not wait and not pending.done():
+                return None
+            self.distance_field = pending.result() if pending else DistanceField(self.maze, self.end)
+            self.distance_pending = None
+        return self.distance_field
+
+    def hint(self):
+        """The cell one move along the shortest path to the exit, or None"""
+        field = self.get_distance_field(wait=False)
+        if not field or not self.player:
+            return None
+        return field.next_step(self.player.x, self.player.y)
+
+    def moves_remaining(self):
+        """Optimal number of moves left from the player's cell, -1 if unknown"""
+        field = self.get_distance_field(wait=False)
+        if not field or not self.player:
+            return -1
+        return field.distance(self.player.x, self.player.y)
+
+    def efficiency(self):
+        """Optimal moves divided by moves taken; 1.0 is a perfect run"""
+        if not self.moves or not self.optimal_moves:
+            return 1.0
+        return min(1.0, self.optimal_moves / self.moves)
+
+    def calculate_score(self):
+        """Calculate player score based on time and moves relative to the optimal path"""
+        if not self.ranked:
+            # No preset to score against
+            self.score = 0
+            return
+        if not self.optimal_moves and self.end:
+            self.optimal_moves = self.get_distance_field().distance(*self.start)
+
+        if self.end_time and self.start_time:
+            elapsed = self.end_time - self.start_time
+            base_score = 1000
+            time_penalty = int(elapsed * 2)
+            move_score = int(base_score * self.efficiency())
+            difficulty_bonus = {"Easy": 0, "Medium": 500, "Hard": 1000}[self.difficulty["name"]]
+
+            self.score = max(0, move_score - time_penalty + difficulty_bonus)
+
+    def check_win_condition(self):
+        """Check if player reached the end"""
+        if self.player and self.maze and self.end:
+            end_x, end_y = self.end
+            if self.player.x == end_x and self.player.y == end_y:
+                self.end_time = self.now()
+                self.calculate_score()
+                if self.ranked:
+                    self.rank = self.leaderboard.submit(self.level_key, self.score, self.moves,
+                                                        self.end_time - self.start_time)
+                self.state = GameState.GAME_OVER
+                return True
+        return False
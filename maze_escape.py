@@ -1,11 +1,14 @@
+import os
 import pygame
-import random
 import sys
 import time
-from enum import Enum
+from collections import OrderedDict
 
-# Initialize Pygame
-pygame.init()
+import maze_core
+from maze_format import load_level
+from maze_prefetch import MazePrefetcher
+from maze_profiler import FrameProfiler
+from maze_core import Difficulty, GameState, HeldDirection, MazeSession
 
 # Constants
 WINDOW_WIDTH = 1000
@@ -13,6 +16,27 @@ WINDOW_HEIGHT = 700
 MAZE_WIDTH = 800
 MAZE_HEIGHT = 600
 MENU_WIDTH = 200
+MIN_CELL_SIZE = 12
+CREDITS_MARGIN = 50
+
+# Game logic advances in fixed steps, independent of how often frames are drawn
+FPS = 60
+UPDATE_STEP = 1 / 60
+MAX_FRAME_TIME = 0.25  # a longer stall is not caught up on
+IDLE_WAIT_MS = 1000
+
+# Race mode bot counts, cycled with B in the menu
+RACE_SIZES = (0, 10, 100, 1000)
+
+# Held arrow keys repeat after REPEAT_DELAY seconds, REPEAT_RATE moves per second
+REPEAT_DELAY = 0.25
+REPEAT_RATE = 15
+KEY_DIRECTIONS = {
+    pygame.K_UP: (0, -1),
+    pygame.K_DOWN: (0, 1),
+    pygame.K_LEFT: (-1, 0),
+    pygame.K_RIGHT: (1, 0),
+}
 
 # Colors
 BLACK = (0, 0, 0)
@@ -28,89 +52,25 @@ PURPLE = (128, 0, 128)
 ORANGE = (255, 165, 0)
 
 
-class GameState(Enum):
-    MENU = 1
-    PLAYING = 2
-    GAME_OVER = 3
-    PAUSE = 4
-    CREDITS = 5
-
-
-class Difficulty:
-    EASY = {"size": 15, "name": "Easy"}
-    MEDIUM = {"size": 25, "name": "Medium"}
-    HARD = {"size": 35, "name": "Hard"}
-
-
-class MazeGenerator:
-    def __init__(self, width, height):
-        self.width = width
-        self.height = height
-        self.maze = [[1 for _ in range(width)] for _ in range(height)]
-
-    def generate_maze(self):
-        """Generate maze using DFS algorithm"""
-        # Start from (1,1)
-        start_x, start_y = 1, 1
-        self.maze[start_y][start_x] = 0
-
-        stack = [(start_x, start_y)]
-
-        while stack:
-            current_x, current_y = stack[-1]
-            neighbors = self.get_unvisited_neighbors(current_x, current_y)
-
-            if neighbors:
-                next_x, next_y = random.choice(neighbors)
-                # Remove the wall between current and next cell
-                wall_x = (current_x + next_x) // 2
-                wall_y = (current_y + next_y) // 2
-                self.maze[wall_y][wall_x] = 0
-                self.maze[next_y][next_x] = 0
-                stack.append((next_x, next_y))
-            else:
-                stack.pop()
-
-        # Ensure start and end are open
-        self.maze[1][1] = 0  # Start
-        self.maze[self.height - 2][self.width - 2] = 0  # End
-
-        return self.maze
-
-    def get_unvisited_neighbors(self, x, y):
-        neighbors = []
-        directions = [(0, 2), (2, 0), (0, -2), (-2, 0)]
-
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if (1 <= nx < self.width - 1 and 1 <= ny < self.height - 1 and
-                    self.maze[ny][nx] == 1):
-                neighbors.append((nx, ny))
-
-        return neighbors
-
-
-class Player:
+class Player(maze_core.Player):
     def __init__(self, x, y, cell_size):
-        self.x = x
-        self.y = y
+        super().__init__(x, y)
         self.cell_size = cell_size
         self.pixel_x = x * cell_size
         self.pixel_y = y * cell_size
 
     def move(self, dx, dy, maze):
-        new_x = self.x + dx
-        new_y = self.y + dy
-
-        if (0 <= new_x < len(maze[0]) and 0 <= new_y < len(maze) and
-                maze[new_y][new_x] == 0):
-            self.x = new_x
-            self.y = new_y
+        if super().move(dx, dy, maze):
             self.pixel_x = self.x * self.cell_size
             self.pixel_y = self.y * self.cell_size
             return True
         return False
 
+    def get_rect(self, offset_x, offset_y):
+        """Screen rectangle of the cell the player occupies"""
+        return pygame.Rect(self.pixel_x + offset_x, self.pixel_y + offset_y,
+                           self.cell_size, self.cell_size)
+
     def draw(self, screen, offset_x, offset_y):
         pygame.draw.circle(screen, BLUE,
                            (self.pixel_x + self.cell_size // 2 + offset_x,
@@ -118,171 +78,472 @@ class Player:
                            self.cell_size // 3)
 
 
-class Game:
-    def __init__(self):
+class TextCache:
+    """Rendered text surfaces keyed by (font, text, color), least recently used evicted first"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, color)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surface
+
+
+class Game(MazeSession):
+    def __init__(self, repeat_delay=REPEAT_DELAY, repeat_rate=REPEAT_RATE):
+        # Upcoming mazes are built in the background so SPACE/R restarts are instant
+        super().__init__(prefetcher=MazePrefetcher(depth=2))
+        self.prefetcher.fill(self.difficulty)
+        # The algorithm chosen with A; Endless ignores it but keeps it for later
+        self.algorithm = self.difficulty["algorithm"]
+
+        # Initialize Pygame
+        pygame.init()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Maze Escape - Labyrinth Game")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
         self.large_font = pygame.font.Font(None, 48)
+        self.tiny_font = pygame.font.Font(None, 18)
+        self.text_cache = TextCache()
+
+        # Frame timing overlay: F3 toggles it, MAZE_PROFILE=1 starts with it on
+        self.profiler = FrameProfiler(enabled=os.environ.get("MAZE_PROFILE") == "1")
 
-        self.state = GameState.MENU
-        self.difficulty = Difficulty.EASY
-        self.maze = None
-        self.player = None
-        self.start_time = 0
-        self.end_time = 0
-        self.score = 0
-        self.moves = 0
+        # Game-over dimming layer, reused every frame
+        self.overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.overlay.set_alpha(180)
+        self.overlay.fill(BLACK)
 
-        # Credits scroll offset
+        # Credits scroll offset; the roll itself is pre-rendered on first view
         self.credits_scroll = 0
         self.credits_speed = 1
+        self.credits_surface = None
+
+        # Maze layer under the camera, re-rendered only when the camera moves
+        self.maze_surface = None
+        self.view_rect = pygame.Rect(10, 0, MAZE_WIDTH, MAZE_HEIGHT)
+        self.view_cols = self.view_rows = 0
+        self.camera_x = self.camera_y = 0
+        self.maze_offset_x = 10
+        self.maze_offset_y = 0
+
+        # Dirty-rect bookkeeping for the PLAYING screen
+        self.ui_rect = pygame.Rect(MAZE_WIDTH + 20, 0, MENU_WIDTH, WINDOW_HEIGHT)
+        self.player_rect = None
+        self.hint_cell = None
+        self.hint_rect = None
+        self.drawn_state = None
+        self.full_redraw = True
+
+        # Frames are only drawn when something changed since the last one
+        self.changed = True
+        self.drawn_elapsed = None
+        self.held = HeldDirection(repeat_delay, repeat_rate)
+
+        # Race mode: bots share the maze through an AgentSwarm
+        self.race_bots = 0
+        self.race = None
+        self.race_place = None
+        self.racer = None
+        self.agent_cells = set()
+
+    def render_text(self, font, text, color):
+        """Render antialiased text through the shared surface cache"""
+        return self.text_cache.render(font, text, color)
+
+    def create_player(self, x, y):
+        """Create the on-screen player sized to the current cells"""
+        return Player(x, y, self.cell_size)
+
+    def start_level(self, level):
+        """Start a generated or loaded level and pre-render it"""
+        # Calculate cell size to fit in the maze area. Cells never shrink
+        # below MIN_CELL_SIZE; larger mazes scroll with the camera instead
+        maze = level.maze
+        fit = MAZE_WIDTH // maze.width
+        if maze.height:
+            fit = min(fit, MAZE_HEIGHT // maze.height)
+        self.cell_size = max(MIN_CELL_SIZE, fit)
+
+        # The view covers at most MAZE_WIDTH x MAZE_HEIGHT pixels of cells
+        self.view_cols = min(maze.width, MAZE_WIDTH // self.cell_size)
+        self.view_rows = MAZE_HEIGHT // self.cell_size
+        if maze.height:
+            self.view_rows = min(maze.height, self.view_rows)
+        self.view_rect = pygame.Rect(10, (WINDOW_HEIGHT - self.view_rows * self.cell_size) // 2,
+                                     self.view_cols * self.cell_size, self.view_rows * self.cell_size)
+
+        super().start_level(level)
+        for name, seconds in level.timings.items():
+            self.profiler.record_operation(name, seconds)
+
+        self.race = None
+        self.race_place = None
+        self.start_race()
+
+        # Pre-render the visible maze layer and force a full repaint
+        self.camera_x = self.camera_y = None
+        self.update_camera()
+        self.player_rect = None
+        self.hint_cell = None
+        self.held.clear()
+        self.full_redraw = True
+
+    def race_waiting(self):
+        """Whether race mode is on but its distance field is still being built"""
+        # Endless corridors have no exit to race to
+        return bool(self.race_bots and self.end and self.race is None)
+
+    def start_race(self):
+        """Put the bots on the start once the level's distance field is ready"""
+        if not self.race_waiting():
+            return
+        field = self.get_distance_field(wait=False)
+        if field is None:
+            return
+        from maze_agents import AgentSwarm  # NumPy is only needed for race mode
+        self.race = AgentSwarm(self.maze, self.end, field, seed=self.seed)
+        self.race.add_bots(self.race_bots, self.start)
+        # The player races as the last agent, so bots win ties
+        self.racer = int(self.race.add(1, (self.player.x, self.player.y))[0])
+        self.changed = True
+
+    def update_camera(self):
+        """Scroll the view so the player stays clear of its edges
+
+        The camera re-centres only once the player comes within a quarter
+        view of an edge, so the visible cells are re-rendered once every
+        several moves rather than on every move.
+        """
+        camera_x = self.scroll_axis(self.camera_x, self.player.x, self.view_cols, self.maze.width)
+        camera_y = self.scroll_axis(self.camera_y, self.player.y, self.view_rows, self.maze.height)
+        if (camera_x, camera_y) == (self.camera_x, self.camera_y):
+            return
 
-    def generate_new_maze(self):
-        """Generate a new maze based on current difficulty"""
-        size = self.difficulty["size"]
-        generator = MazeGenerator(size, size)
-        self.maze = generator.generate_maze()
-
-        # Calculate cell size to fit in the maze area
-        self.cell_size = min(MAZE_WIDTH // size, MAZE_HEIGHT // size)
-
-        # Create player at start position
-        self.player = Player(1, 1, self.cell_size)
+        self.camera_x, self.camera_y = camera_x, camera_y
+        self.maze_offset_x = self.view_rect.x - camera_x * self.cell_size
+        self.maze_offset_y = self.view_rect.y - camera_y * self.cell_size
+        self.render_maze_surface()
+        self.full_redraw = True
+
+    @staticmethod
+    def scroll_axis(camera, position, view, size):
+        """Camera coordinate along one axis; ``size`` is None for unbounded mazes"""
+        if size is not None and size <= view:
+            return 0
+
+        margin = view // 4
+        if camera is not None and camera + margin <= position < camera + view - margin:
+            return camera
+
+        camera = max(0, position - view // 2)
+        if size is not None:
+            camera = min(camera, size - view)
+        return camera
+
+    def load_level_file(self, path):
+        """Play a maze file written by ``maze_format.save_level``"""
+        self.start_loaded_level(load_level(path))
+        self.state = GameState.PLAYING
+
+    def render_maze_surface(self):
+        """Render the cells under the camera into an off-screen surface
+
+        Only the visible cells are drawn, so the cost depends on the screen
+        size and not on the maze size.
+        """
+        cell_size = self.cell_size
+        self.maze_surface = pygame.Surface(self.view_rect.size)
+        self.maze_surface.fill(WHITE)
+
+        if self.fog:
+            # The layer now shows every revealed cell, queued ones included
+            self.fog.take_revealed()
+            for row in range(self.view_rows):
+                for col in range(self.view_cols):
+                    self.paint_cell(self.camera_x + col, self.camera_y + row)
+            return
 
-        # Reset game stats
-        self.start_time = time.time()
-        self.moves = 0
-        self.score = 0
+        is_open = self.maze.is_open
+        for row in range(self.view_rows):
+            y = self.camera_y + row
+            for col in range(self.view_cols):
+                rect = pygame.Rect(col * cell_size, row * cell_size, cell_size, cell_size)
+
+                if not is_open(self.camera_x + col, y):  # Wall
+                    pygame.draw.rect(self.maze_surface, BLACK, rect)
+
+                pygame.draw.rect(self.maze_surface, GRAY, rect, 1)
+
+        # Draw start (green) and end (red) positions; off-view tiles are clipped
+        start_x, start_y = self.start
+        start_rect = pygame.Rect((start_x - self.camera_x) * cell_size, (start_y - self.camera_y) * cell_size,
+                                 cell_size, cell_size)
+        pygame.draw.rect(self.maze_surface, GREEN, start_rect)
+
+        if self.end:
+            end_x, end_y = self.end
+            end_rect = pygame.Rect((end_x - self.camera_x) * cell_size, (end_y - self.camera_y) * cell_size,
+                                   cell_size, cell_size)
+            pygame.draw.rect(self.maze_surface, RED, end_rect)
+
+    def paint_cell(self, x, y):
+        """Paint maze cell (x, y) onto the maze layer as the fog allows
+
+        Returns the cell's rectangle on the layer; cells outside the view
+        are clipped.
+        """
+        cell_size = self.cell_size
+        rect = pygame.Rect((x - self.camera_x) * cell_size, (y - self.camera_y) * cell_size,
+                           cell_size, cell_size)
+        if not self.fog.is_seen(x, y):
+            pygame.draw.rect(self.maze_surface, DARK_GRAY, rect)
+            return rect
+
+        if (x, y) == self.start:
+            color = GREEN
+        elif (x, y) == self.end:
+            color = RED
+        else:
+            color = WHITE if self.maze.is_open(x, y) else BLACK
+        pygame.draw.rect(self.maze_surface, color, rect)
+        pygame.draw.rect(self.maze_surface, GRAY, rect, 1)
+
+        if color == WHITE and self.fog.is_visited(x, y):
+            # Breadcrumb
+            pygame.draw.circle(self.maze_surface, ORANGE, rect.center, max(1, cell_size // 6))
+        return rect
+
+    def apply_revealed(self):
+        """Paint cells revealed since the last frame; returns their screen rectangles"""
+        if not self.fog:
+            return []
+        view = self.maze_surface.get_rect()
+        dirty = []
+        for x, y in self.fog.take_revealed():
+            rect = self.paint_cell(x, y)
+            if view.colliderect(rect):
+                screen_rect = rect.move(self.view_rect.topleft)
+                self.restore_cell(screen_rect)
+                dirty.append(screen_rect)
+        return dirty
+
+    def draw_agents(self, full=False):
+        """Draw race bots over the maze; returns the screen rectangles touched
+
+        Only cells whose occupancy changed since the last call are redrawn,
+        unless ``full`` is set after the whole maze layer was blitted.
+        """
+        if self.race is None:
+            return []
+        cells = self.race.occupied(self.camera_x, self.camera_y, self.view_cols, self.view_rows,
+                                   bots_only=True)
+        if self.fog:
+            cells = {cell for cell in cells if self.fog.is_seen(*cell)}
+
+        dirty = []
+        if not full:
+            for cell in self.agent_cells - cells:
+                rect = self.cell_rect(*cell)
+                self.restore_cell(rect)
+                dirty.append(rect)
+        inset = -(self.cell_size // 2)
+        for cell in (cells if full else cells - self.agent_cells):
+            rect = self.cell_rect(*cell)
+            pygame.draw.rect(self.screen, PURPLE, rect.inflate(inset, inset))
+            dirty.append(rect)
+        self.agent_cells = cells
+        return dirty
 
     def draw_maze(self):
         """Draw the maze on screen"""
         if not self.maze:
             return
 
-        maze_offset_x = 10
-        maze_offset_y = (WINDOW_HEIGHT - len(self.maze) * self.cell_size) // 2
-
-        for y, row in enumerate(self.maze):
-            for x, cell in enumerate(row):
-                rect = pygame.Rect(x * self.cell_size + maze_offset_x,
-                                   y * self.cell_size + maze_offset_y,
-                                   self.cell_size, self.cell_size)
-
-                if cell == 1:  # Wall
-                    pygame.draw.rect(self.screen, BLACK, rect)
-                else:  # Path
-                    pygame.draw.rect(self.screen, WHITE, rect)
+        self.apply_revealed()
+        self.screen.blit(self.maze_surface, self.view_rect)
+        self.draw_agents(full=True)
 
-                pygame.draw.rect(self.screen, GRAY, rect, 1)
-
-        # Draw start (green) and end (red) positions
-        start_rect = pygame.Rect(1 * self.cell_size + maze_offset_x,
-                                 1 * self.cell_size + maze_offset_y,
-                                 self.cell_size, self.cell_size)
-        pygame.draw.rect(self.screen, GREEN, start_rect)
-
-        end_x, end_y = len(self.maze[0]) - 2, len(self.maze) - 2
-        end_rect = pygame.Rect(end_x * self.cell_size + maze_offset_x,
-                               end_y * self.cell_size + maze_offset_y,
-                               self.cell_size, self.cell_size)
-        pygame.draw.rect(self.screen, RED, end_rect)
+        # Draw hint marker
+        self.hint_rect = None
+        if self.hint_cell:
+            self.hint_rect = self.cell_rect(*self.hint_cell)
+            pygame.draw.circle(self.screen, YELLOW, self.hint_rect.center, max(1, self.cell_size // 5))
 
         # Draw player
         if self.player:
-            self.player.draw(self.screen, maze_offset_x, maze_offset_y)
+            self.player.draw(self.screen, self.maze_offset_x, self.maze_offset_y)
+            self.player_rect = self.player.get_rect(self.maze_offset_x, self.maze_offset_y)
+
+    def cell_rect(self, x, y):
+        """Screen rectangle of maze cell (x, y)"""
+        return pygame.Rect(x * self.cell_size + self.maze_offset_x,
+                           y * self.cell_size + self.maze_offset_y,
+                           self.cell_size, self.cell_size)
+
+    def restore_cell(self, rect):
+        """Repaint a screen rectangle from the static maze layer"""
+        self.screen.blit(self.maze_surface, rect, rect.move(-self.view_rect.x, -self.view_rect.y))
+
+    def draw_player_update(self):
+        """Redraw only the cells the player vacated and now occupies"""
+        # Newly revealed cells and moved bots; repainting may have covered the player
+        dirty = self.apply_revealed()
+        dirty += self.draw_agents()
+        if self.player_rect and self.player_rect.collidelist(dirty) >= 0:
+            self.player_rect = None
+
+        if self.hint_rect and not self.hint_cell:
+            # The hint was consumed by a move; erase its marker
+            self.restore_cell(self.hint_rect)
+            dirty.append(self.hint_rect)
+            self.hint_rect = None
+
+        new_rect = self.player.get_rect(self.maze_offset_x, self.maze_offset_y)
+        if new_rect == self.player_rect:
+            return dirty
+
+        dirty.append(new_rect)
+        if self.player_rect:
+            # Restore the vacated cell from the static maze layer
+            self.restore_cell(self.player_rect)
+            dirty.append(self.player_rect)
+
+        self.restore_cell(new_rect)
+        self.player.draw(self.screen, self.maze_offset_x, self.maze_offset_y)
+        self.player_rect = new_rect
+        return dirty
 
     def draw_ui(self):
         """Draw game UI elements"""
         # Background for UI area
-        ui_rect = pygame.Rect(MAZE_WIDTH + 20, 0, MENU_WIDTH, WINDOW_HEIGHT)
-        pygame.draw.rect(self.screen, LIGHT_GRAY, ui_rect)
-        pygame.draw.rect(self.screen, BLACK, ui_rect, 2)
+        pygame.draw.rect(self.screen, LIGHT_GRAY, self.ui_rect)
+        pygame.draw.rect(self.screen, BLACK, self.ui_rect, 2)
 
         y_offset = 50
 
         # Difficulty
-        diff_text = self.font.render("Difficulty:", True, BLACK)
+        diff_text = self.render_text(self.font, "Difficulty:", BLACK)
         self.screen.blit(diff_text, (MAZE_WIDTH + 30, y_offset))
-        diff_name = self.small_font.render(self.difficulty["name"], True, BLUE)
+        diff_name = self.render_text(self.small_font,
+                                     f"{self.difficulty['name']} ({self.difficulty['algorithm']})", BLUE)
         self.screen.blit(diff_name, (MAZE_WIDTH + 30, y_offset + 30))
+        seed_text = self.render_text(self.small_font, f"Seed: {self.seed}", DARK_GRAY)
+        self.screen.blit(seed_text, (MAZE_WIDTH + 30, y_offset + 52))
 
         y_offset += 80
 
         # Timer
-        if self.state == GameState.PLAYING:
-            elapsed = int(time.time() - self.start_time)
-        else:
-            elapsed = int(self.end_time - self.start_time) if self.end_time else 0
+        elapsed = self.elapsed_seconds()
+        self.drawn_elapsed = elapsed
 
-        timer_text = self.font.render("Time:", True, BLACK)
+        timer_text = self.render_text(self.font, "Time:", BLACK)
         self.screen.blit(timer_text, (MAZE_WIDTH + 30, y_offset))
-        time_value = self.small_font.render(f"{elapsed}s", True, BLUE)
+        time_value = self.render_text(self.small_font, f"{elapsed}s", BLUE)
         self.screen.blit(time_value, (MAZE_WIDTH + 30, y_offset + 30))
 
         y_offset += 80
 
         # Moves
-        moves_text = self.font.render("Moves:", True, BLACK)
+        moves_text = self.render_text(self.font, "Moves:", BLACK)
         self.screen.blit(moves_text, (MAZE_WIDTH + 30, y_offset))
-        moves_value = self.small_font.render(str(self.moves), True, BLUE)
+        moves_value = self.render_text(self.small_font, str(self.moves), BLUE)
         self.screen.blit(moves_value, (MAZE_WIDTH + 30, y_offset + 30))
 
         y_offset += 80
 
-        # Score
-        score_text = self.font.render("Score:", True, BLACK)
+        # Score (endless corridors have no exit, so show the depth reached)
+        if self.end:
+            score_label, score = "Score:", self.score if self.ranked else "unranked"
+        else:
+            score_label, score = "Depth:", self.depth
+        score_text = self.render_text(self.font, score_label, BLACK)
         self.screen.blit(score_text, (MAZE_WIDTH + 30, y_offset))
-        score_value = self.small_font.render(str(self.score), True, BLUE)
+        score_value = self.render_text(self.small_font, str(score), BLUE)
         self.screen.blit(score_value, (MAZE_WIDTH + 30, y_offset + 30))
+        if self.race is not None:
+            home = self.render_text(self.small_font, f"Bots home: {self.race.bots_home()}/{len(self.race) - 1}",
+                                    PURPLE)
+            self.screen.blit(home, (MAZE_WIDTH + 30, y_offset + 55))
 
         y_offset += 100
 
         # Controls
-        controls_text = self.small_font.render("Controls:", True, BLACK)
+        controls_text = self.render_text(self.small_font, "Controls:", BLACK)
         self.screen.blit(controls_text, (MAZE_WIDTH + 30, y_offset))
 
-        controls = ["Arrow Keys - Move", "R - Restart", "ESC - Menu"]
+        controls = ["Arrow Keys - Move", "H - Hint", "R - Restart", "ESC - Menu"]
         for i, control in enumerate(controls):
-            control_text = self.small_font.render(control, True, DARK_GRAY)
+            control_text = self.render_text(self.small_font, control, DARK_GRAY)
             self.screen.blit(control_text, (MAZE_WIDTH + 30, y_offset + 30 + i * 25))
 
+        # Frame timings change every frame, so they bypass the text cache
+        if self.profiler.enabled:
+            for i, line in enumerate(self.profiler.overlay_lines()):
+                profile_text = self.tiny_font.render(line, True, PURPLE)
+                self.screen.blit(profile_text, (MAZE_WIDTH + 25, 540 + i * 18))
+
     def draw_menu(self):
         """Draw main menu"""
         self.screen.fill(WHITE)
 
         # Title
-        title = self.large_font.render("MAZE ESCAPE", True, BLACK)
+        title = self.render_text(self.large_font, "MAZE ESCAPE", BLACK)
         title_rect = title.get_rect(center=(WINDOW_WIDTH // 2, 120))
         self.screen.blit(title, title_rect)
 
-        subtitle = self.small_font.render("Labyrinth Game with Python", True, GRAY)
+        subtitle = self.render_text(self.small_font, "Labyrinth Game with Python", GRAY)
         subtitle_rect = subtitle.get_rect(center=(WINDOW_WIDTH // 2, 155))
         self.screen.blit(subtitle, subtitle_rect)
 
         # Difficulty selection
-        diff_title = self.font.render("Select Difficulty:", True, BLACK)
+        diff_title = self.render_text(self.font, "Select Difficulty:", BLACK)
         diff_rect = diff_title.get_rect(center=(WINDOW_WIDTH // 2, 220))
         self.screen.blit(diff_title, diff_rect)
 
-        difficulties = [Difficulty.EASY, Difficulty.MEDIUM, Difficulty.HARD]
-        colors = [GREEN, ORANGE, RED]  # Changed YELLOW to ORANGE for better visibility
+        difficulties = Difficulty.PRESETS
+        colors = [GREEN, ORANGE, RED, PURPLE]  # Changed YELLOW to ORANGE for better visibility
 
         for i, (diff, color) in enumerate(zip(difficulties, colors)):
-            y_pos = 270 + i * 50
+            y_pos = 255 + i * 40
 
             # Highlight current difficulty
-            if diff == self.difficulty:
+            if diff["name"] == self.difficulty["name"]:
                 highlight_rect = pygame.Rect(WINDOW_WIDTH // 2 - 120, y_pos - 5, 240, 35)
                 pygame.draw.rect(self.screen, LIGHT_GRAY, highlight_rect)
 
-            diff_text = self.font.render(f"{i + 1}. {diff['name']} ({diff['size']}x{diff['size']})",
-                                         True, color)
+            if diff.get("endless"):
+                label = f"{i + 1}. {diff['name']} ({diff['size']} wide)"
+            else:
+                label = f"{i + 1}. {diff['name']} ({diff['size']}x{diff['size']})"
+            diff_text = self.render_text(self.font, label, color)
             diff_rect = diff_text.get_rect(center=(WINDOW_WIDTH // 2, y_pos + 10))
             self.screen.blit(diff_text, diff_rect)
 
+        fog = "on" if self.fog_of_war else "off"
+        change = "fixed for Endless" if self.difficulty.get("endless") else "A to change"
+        algo_text = self.render_text(self.small_font,
+                                     f"Algorithm: {self.difficulty['algorithm']} ({change})"
+                                     f"   Fog of war: {fog} (F)   Bots: {self.race_bots} (B)", DARK_GRAY)
+        algo_rect = algo_text.get_rect(center=(WINDOW_WIDTH // 2, 430))
+        self.screen.blit(algo_text, algo_rect)
+
         # Menu options
         menu_options = [
             ("Press SPACE to start game", WHITE),
@@ -290,8 +551,8 @@ class Game:
         ]
 
         for i, (option, color) in enumerate(menu_options):
-            option_text = self.font.render(option, True, color)
-            option_rect = option_text.get_rect(center=(WINDOW_WIDTH // 2, 440 + i * 40))
+            option_text = self.render_text(self.font, option, color)
+            option_rect = option_text.get_rect(center=(WINDOW_WIDTH // 2, 470 + i * 40))
 
             # Add background for better visibility
             bg_rect = pygame.Rect(option_rect.x - 10, option_rect.y - 5,
@@ -306,14 +567,12 @@ class Game:
         ]
 
         for i, instruction in enumerate(instructions):
-            inst_text = self.small_font.render(instruction, True, DARK_GRAY)
-            inst_rect = inst_text.get_rect(center=(WINDOW_WIDTH // 2, 550 + i * 25))
+            inst_text = self.render_text(self.small_font, instruction, DARK_GRAY)
+            inst_rect = inst_text.get_rect(center=(WINDOW_WIDTH // 2, 570 + i * 25))
             self.screen.blit(inst_text, inst_rect)
 
-    def draw_credits(self):
-        """Draw credits screen with scrolling animation"""
-        self.screen.fill(BLACK)
-
+    def render_credits(self):
+        """Pre-render the whole credits roll into one tall surface"""
         # Credits data
         credits_data = [
             {"text": "MAZE ESCAPE", "font": self.large_font, "color": YELLOW, "spacing": 80},
@@ -344,19 +603,28 @@ class Game:
         # Calculate total height of credits
         total_height = sum(item["spacing"] for item in credits_data)
 
-        # Draw credits with scroll offset
-        current_y = WINDOW_HEIGHT - self.credits_scroll
+        # Lines are centred on their y position, so pad the top by CREDITS_MARGIN
+        self.credits_surface = pygame.Surface((WINDOW_WIDTH, total_height + 2 * CREDITS_MARGIN))
+        self.credits_surface.fill(BLACK)
+        current_y = CREDITS_MARGIN
 
         for item in credits_data:
-            if -50 < current_y < WINDOW_HEIGHT + 50:  # Only draw visible text
-                text_surface = item["font"].render(item["text"], True, item["color"])
-                text_rect = text_surface.get_rect(center=(WINDOW_WIDTH // 2, current_y))
-                self.screen.blit(text_surface, text_rect)
+            text_surface = item["font"].render(item["text"], True, item["color"])
+            text_rect = text_surface.get_rect(center=(WINDOW_WIDTH // 2, current_y))
+            self.credits_surface.blit(text_surface, text_rect)
 
             current_y += item["spacing"]
 
-        # Update scroll position
-        self.credits_scroll += self.credits_speed
+    def draw_credits(self):
+        """Draw credits screen with scrolling animation"""
+        self.screen.fill(BLACK)
+
+        if self.credits_surface is None:
+            self.render_credits()
+        total_height = self.credits_surface.get_height() - 2 * CREDITS_MARGIN
+
+        # Draw credits with scroll offset
+        self.screen.blit(self.credits_surface, (0, WINDOW_HEIGHT - self.credits_scroll - CREDITS_MARGIN))
 
         # Reset scroll when credits finish
         if self.credits_scroll > total_height + WINDOW_HEIGHT:
@@ -364,7 +632,7 @@ class Game:
 
         # Instructions at bottom
         instruction = "Press ESC to return to menu"
-        inst_surface = self.small_font.render(instruction, True, WHITE)
+        inst_surface = self.render_text(self.small_font, instruction, WHITE)
         inst_rect = inst_surface.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT - 30))
 
         # Add background for better visibility
@@ -376,13 +644,10 @@ class Game:
     def draw_game_over(self):
         """Draw game over screen"""
         # Semi-transparent overlay
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        overlay.set_alpha(180)
-        overlay.fill(BLACK)
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.overlay, (0, 0))
 
         # Game Over text
-        game_over_text = self.font.render("MAZE COMPLETED!", True, WHITE)
+        game_over_text = self.render_text(self.font, "MAZE COMPLETED!", WHITE)
         game_over_rect = game_over_text.get_rect(center=(WINDOW_WIDTH // 2, 200))
         self.screen.blit(game_over_text, game_over_rect)
 
@@ -390,13 +655,17 @@ class Game:
         elapsed = int(self.end_time - self.start_time)
         stats = [
             f"Time: {elapsed} seconds",
-            f"Moves: {self.moves}",
-            f"Score: {self.score}",
-            f"Difficulty: {self.difficulty['name']}"
+            f"Moves: {self.moves} (optimal {self.optimal_moves}, {self.efficiency():.0%} efficient)",
+            f"Score: {self.score if self.ranked else 'unranked'}",
+            f"Difficulty: {self.difficulty['name']}",
+            f"Best on this maze: {self.leaderboard.best(self.level_key)}"
+            + (f" - you placed #{self.rank}" if self.rank else "")
         ]
+        if self.race_place:
+            stats.append(f"Race: finished #{self.race_place} of {len(self.race)}")
 
         for i, stat in enumerate(stats):
-            stat_text = self.small_font.render(stat, True, WHITE)
+            stat_text = self.render_text(self.small_font, stat, WHITE)
             stat_rect = stat_text.get_rect(center=(WINDOW_WIDTH // 2, 260 + i * 30))
             self.screen.blit(stat_text, stat_rect)
 
@@ -407,46 +676,98 @@ class Game:
         ]
 
         for i, option in enumerate(options):
-            option_text = self.small_font.render(option, True, YELLOW)
-            option_rect = option_text.get_rect(center=(WINDOW_WIDTH // 2, 400 + i * 30))
+            option_text = self.render_text(self.small_font, option, YELLOW)
+            option_rect = option_text.get_rect(center=(WINDOW_WIDTH // 2, 290 + len(stats) * 30 + i * 30))
             self.screen.blit(option_text, option_rect)
 
-    def calculate_score(self):
-        """Calculate player score based on time and moves"""
-        if self.end_time and self.start_time:
-            elapsed = self.end_time - self.start_time
-            base_score = 1000
-            time_penalty = int(elapsed * 2)
-            move_penalty = self.moves * 5
-            difficulty_bonus = {"Easy": 0, "Medium": 500, "Hard": 1000}[self.difficulty["name"]]
-
-            self.score = max(0, base_score - time_penalty - move_penalty + difficulty_bonus)
+    def move(self, dx, dy):
+        """Move the player; a successful move uses up any shown hint"""
+        if super().move(dx, dy):
+            if self.race is not None:
+                self.race.place(self.racer, self.player.x, self.player.y)
+            self.hint_cell = None
+            self.update_camera()
+            self.changed = True
+            # Win as soon as the exit is reached, as replays are verified
+            self.check_win_condition()
+            return True
+        return False
 
     def check_win_condition(self):
-        """Check if player reached the end"""
-        if self.player and self.maze:
-            end_x, end_y = len(self.maze[0]) - 2, len(self.maze) - 2
-            if self.player.x == end_x and self.player.y == end_y:
-                self.end_time = time.time()
-                self.calculate_score()
-                self.state = GameState.GAME_OVER
-                return True
+        """Check for a win, recording the player's place when racing bots"""
+        if super().check_win_condition():
+            if self.race is not None:
+                self.race_place = self.race.rank(self.racer)
+            return True
         return False
 
-    def handle_events(self):
+    def show_hint(self):
+        """Mark the next cell on the shortest path to the exit"""
+        self.hint_cell = self.hint()
+        self.full_redraw = True
+
+    def select_difficulty(self, preset):
+        """Switch difficulty while keeping the chosen maze algorithm"""
+        self.difficulty = Difficulty.with_algorithm(preset, self.algorithm)
+        self.prefetcher.fill(self.difficulty)
+
+    def cycle_algorithm(self):
+        """Advance to the next registered maze algorithm; Endless always uses Eller's"""
+        if self.difficulty.get("endless"):
+            return
+        algorithms = Difficulty.algorithms()
+        index = algorithms.index(self.algorithm)
+        self.algorithm = algorithms[(index + 1) % len(algorithms)]
+        self.difficulty = Difficulty.with_algorithm(self.difficulty, self.algorithm)
+        self.prefetcher.fill(self.difficulty)
+
+    def elapsed_seconds(self):
+        """Whole seconds shown on the timer"""
+        if self.state == GameState.PLAYING:
+            return int(self.now() - self.start_time)
+        return int(self.end_time - self.start_time) if self.end_time else 0
+
+    def handle_events(self, events):
         """Handle pygame events"""
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
 
+            elif event.type == pygame.KEYUP:
+                if event.key in KEY_DIRECTIONS:
+                    self.held.release(KEY_DIRECTIONS[event.key])
+
+            elif event.type == pygame.WINDOWFOCUSLOST:
+                # Key releases now go to another window, so stop repeating
+                self.held.clear()
+
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.full_redraw = True
+
             elif event.type == pygame.KEYDOWN:
-                if self.state == GameState.MENU:
+                self.changed = True
+                if event.key == pygame.K_F3:
+                    self.profiler.toggle()
+                    self.full_redraw = True
+                elif event.key == pygame.K_F4:
+                    self.profiler.dump_csv(os.environ.get("MAZE_PROFILE_CSV", "maze_profile.csv"))
+
+                elif self.state == GameState.MENU:
                     if event.key == pygame.K_1:
-                        self.difficulty = Difficulty.EASY
+                        self.select_difficulty(Difficulty.EASY)
                     elif event.key == pygame.K_2:
-                        self.difficulty = Difficulty.MEDIUM
+                        self.select_difficulty(Difficulty.MEDIUM)
                     elif event.key == pygame.K_3:
-                        self.difficulty = Difficulty.HARD
+                        self.select_difficulty(Difficulty.HARD)
+                    elif event.key == pygame.K_4:
+                        self.select_difficulty(Difficulty.ENDLESS)
+                    elif event.key == pygame.K_a:
+                        self.cycle_algorithm()
+                    elif event.key == pygame.K_f:
+                        self.fog_of_war = not self.fog_of_war
+                    elif event.key == pygame.K_b:
+                        index = RACE_SIZES.index(self.race_bots)
+                        self.race_bots = RACE_SIZES[(index + 1) % len(RACE_SIZES)]
                     elif event.key == pygame.K_SPACE:
                         self.generate_new_maze()
                         self.state = GameState.PLAYING
@@ -455,18 +776,13 @@ class Game:
                         self.credits_scroll = 0  # Reset scroll position
 
                 elif self.state == GameState.PLAYING:
-                    if event.key == pygame.K_UP:
-                        if self.player.move(0, -1, self.maze):
-                            self.moves += 1
-                    elif event.key == pygame.K_DOWN:
-                        if self.player.move(0, 1, self.maze):
-                            self.moves += 1
-                    elif event.key == pygame.K_LEFT:
-                        if self.player.move(-1, 0, self.maze):
-                            self.moves += 1
-                    elif event.key == pygame.K_RIGHT:
-                        if self.player.move(1, 0, self.maze):
-                            self.moves += 1
+                    if event.key in KEY_DIRECTIONS:
+                        # The press moves at once; holding it repeats in update()
+                        direction = KEY_DIRECTIONS[event.key]
+                        self.held.press(direction)
+                        self.move(*direction)
+                    elif event.key == pygame.K_h:
+                        self.show_hint()
                     elif event.key == pygame.K_r:
                         self.generate_new_maze()
                     elif event.key == pygame.K_ESCAPE:
@@ -485,13 +801,59 @@ class Game:
 
         return True
 
-    def update(self):
-        """Update game state"""
+    def update(self, dt=UPDATE_STEP):
+        """Advance game logic by one fixed step of ``dt`` seconds"""
         if self.state == GameState.PLAYING:
-            self.check_win_condition()
+            if self.race_waiting():
+                self.start_race()
+            if self.race is not None and len(self.race.step(dt)):
+                self.changed = True
+            repeats = self.held.advance(dt)
+            while repeats and self.state == GameState.PLAYING:
+                self.move(*self.held.direction)
+                repeats -= 1
+            if self.state == GameState.PLAYING:
+                self.check_win_condition()
+        elif self.state == GameState.CREDITS:
+            self.credits_scroll += self.credits_speed
+
+    def needs_redraw(self):
+        """Whether the screen is out of date"""
+        if self.changed or self.full_redraw or self.state != self.drawn_state:
+            return True
+        if self.state == GameState.CREDITS or self.profiler.enabled:
+            return True
+        return self.state == GameState.PLAYING and self.elapsed_seconds() != self.drawn_elapsed
+
+    def idle_timeout(self):
+        """Milliseconds the loop may sleep waiting for input, or 0 if a frame is due"""
+        if self.state == GameState.PLAYING and (self.held.direction or self.race_waiting() or
+                                                (self.race is not None and self.race.bots_racing())):
+            return 0
+        if self.needs_redraw():
+            return 0
+        if self.state == GameState.PLAYING:
+            # Wake up in time for the next tick of the on-screen timer
+            return int(1000 * (1 - (self.now() - self.start_time) % 1)) + 1
+        return IDLE_WAIT_MS
 
     def draw(self):
-        """Draw everything"""
+        """Draw everything
+
+        Returns the list of screen rectangles that changed, or None when the
+        whole frame was repainted and needs a full flip.
+        """
+        self.changed = False
+        if (self.state == GameState.PLAYING and self.drawn_state == GameState.PLAYING
+                and not self.full_redraw):
+            dirty = self.draw_player_update()
+            self.draw_ui()
+            dirty.append(self.ui_rect)
+            return dirty
+
+        self.drawn_state = self.state
+        self.full_redraw = False
+
         if self.state == GameState.MENU:
             self.draw_menu()
         elif self.state == GameState.PLAYING:
@@ -505,19 +867,66 @@ class Game:
             self.draw_game_over()
         elif self.state == GameState.CREDITS:
             self.draw_credits()
+        return None
 
     def run(self):
-        """Main game loop"""
+        """Main game loop
+
+        Logic runs in fixed UPDATE_STEP steps however long frames take, and a
+        frame is only drawn when needs_redraw() says the screen is stale.
+        With nothing to animate the loop sleeps in pygame.event.wait().
+        """
         running = True
+        previous = time.perf_counter()
+        lag = 0.0
 
         while running:
-            running = self.handle_events()
-            self.update()
-            self.draw()
-
-            pygame.display.flip()
-            self.clock.tick(60)
-
+            timeout = self.idle_timeout()
+            if timeout:
+                event = pygame.event.wait(timeout)
+                events = [] if event.type == pygame.NOEVENT else [event]
+                events += pygame.event.get()
+                # Time spent asleep is not simulated
+                previous = time.perf_counter()
+            else:
+                events = pygame.event.get()
+
+            # Read once so a frame that toggles the profiler stays consistent
+            profiling = self.profiler.enabled
+            if profiling:
+                self.profiler.begin_frame()
+
+            running = self.handle_events(events)
+            if profiling:
+                self.profiler.mark("events")
+
+            now = time.perf_counter()
+            lag += min(now - previous, MAX_FRAME_TIME)
+            previous = now
+            while lag >= UPDATE_STEP:
+                self.update(UPDATE_STEP)
+                lag -= UPDATE_STEP
+            if profiling:
+                self.profiler.mark("update")
+
+            if self.needs_redraw():
+                dirty = self.draw()
+                if profiling:
+                    self.profiler.mark("draw")
+                if dirty is None:
+                    pygame.display.flip()
+                else:
+                    pygame.display.update(dirty)
+            elif profiling:
+                self.profiler.mark("draw")
+            if profiling:
+                self.profiler.mark("present")
+            self.clock.tick(FPS)
+            if profiling:
+                self.profiler.mark("tick")
+                self.profiler.end_frame()
+
+        self.prefetcher.shutdown()
         pygame.quit()
         sys.exit()
 
@@ -525,4 +934,6 @@ class Game:
 # Main execution
 if __name__ == "__main__":
     game = Game()
+    if len(sys.argv) > 1:
+        game.load_level_file(sys.argv[1])
     game.run()
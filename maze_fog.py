@@ -0,0 +1,94 @@
+"""Fog of war: which cells the player has seen and where they have been."""
+
+# Directions the player looks in, as (dx, dy)
+SIGHT_LINES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class FogOfWar:
+    """Seen and visited bitmaps for one maze, updated one move at a time.
+
+    Both are bit-packed like maze files, one bit per cell with cell i in
+    bit ``i % 8`` of byte ``i // 8``, so a 1001 x 1001 maze needs about
+    125 KB each. They grow on demand, which lets the same class follow an
+    ``InfiniteMaze`` downwards.
+
+    ``reveal(x, y)`` marks the player's cell as visited and looks along the
+    corridors in all four directions until a wall (or ``sight`` cells)
+    stops the view, seeing the walls and side openings on the way. The cost
+    is proportional to the length of the corridors in view, never to the
+    maze size. Newly seen cells and breadcrumbs queue up in ``revealed`` and
+    ``trail`` until a renderer collects them with ``take_revealed()``.
+    """
+
+    def __init__(self, maze, sight=None):
+        self.maze = maze
+        self.width = maze.width
+        self.sight = sight
+        cells = self.width * maze.height if maze.height else self.width * 64
+        self.seen = bytearray((cells + 7) // 8)
+        self.visited = bytearray(len(self.seen))
+        self.seen_count = 0
+        self.revealed = []
+        self.trail = []
+
+    def grow(self, index):
+        # Double, so an endless descent reallocates only O(log depth) times
+        extra = max(len(self.seen), (index >> 3) + 1 - len(self.seen))
+        self.seen.extend(bytes(extra))
+        self.visited.extend(bytes(extra))
+
+    def is_seen(self, x, y):
+        index = y * self.width + x
+        return index >> 3 < len(self.seen) and self.seen[index >> 3] >> (index & 7) & 1
+
+    def is_visited(self, x, y):
+        index = y * self.width + x
+        return index >> 3 < len(self.visited) and self.visited[index >> 3] >> (index & 7) & 1
+
+    def see(self, x, y):
+        """Mark (x, y) as seen, queueing it for the renderer if it is new"""
+        if not 0 <= x < self.width or y < 0 or (self.maze.height and y >= self.maze.height):
+            return
+        index = y * self.width + x
+        if index >> 3 >= len(self.seen):
+            self.grow(index)
+        bit = 1 << (index & 7)
+        if not self.seen[index >> 3] & bit:
+            self.seen[index >> 3] |= bit
+            self.seen_count += 1
+            self.revealed.append((x, y))
+
+    def reveal(self, x, y):
+        """Update both bitmaps for the player standing on (x, y)"""
+        self.see(x, y)
+        index = y * self.width + x
+        bit = 1 << (index & 7)
+        if not self.visited[index >> 3] & bit:
+            self.visited[index >> 3] |= bit
+            self.trail.append((x, y))
+
+        is_open = self.maze.is_open
+        see = self.see
+        for dx, dy in SIGHT_LINES:
+            cx, cy = x, y
+            distance = 0
+            while True:
+                # The walls either side of the corridor, or side openings
+                see(cx + dy, cy + dx)
+                see(cx - dy, cy - dx)
+                cx += dx
+                cy += dy
+                distance += 1
+                see(cx, cy)
+                if not is_open(cx, cy) or distance == self.sight:
+                    # Include the corners of the wall closing the view
+                    see(cx + dy, cy + dx)
+                    see(cx - dy, cy - dx)
+                    break
+
+    def take_revealed(self):
+        """Cells seen or first visited since the last call"""
+        cells = self.revealed + self.trail
+        self.revealed = []
+        self.trail = []
+        return cells
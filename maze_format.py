@@ -0,0 +1,169 @@
+"""Versioned binary maze files with memory-mapped loading.
+
+Layout (little-endian), version 1::
+
+    offset  size  field
+    0       4     magic b"MAZE"
+    4       1     format version
+    5       1     cell encoding (0 = one bit per cell, 1 = wall)
+    6       2     reserved, zero
+    8       4     width
+    12      4     height
+    16      8     seed
+    24      16    start x, start y, end x, end y (u32 each)
+    40      4     optimal moves from start to end (0 = unknown)
+    44      1     algorithm name length
+    45      19    algorithm name, ASCII, zero padded
+    64      ...   cells, row-major, bit i of byte i // 8 is cell i (LSB first)
+
+A 5000 x 5000 maze takes a little over 3 MB. Loading only parses the
+64-byte header; cells are read straight out of the mapped file on demand.
+"""
+import mmap
+import os
+import struct
+
+from maze_core import Level
+from maze_grid import PATH, MazeGrid
+
+MAGIC = b"MAZE"
+VERSION = 1
+ENCODING_BITS = 0
+HEADER = struct.Struct("<4sBBHIIQIIIIIB19s")
+
+# Byte value -> the eight cells it encodes, one byte each
+_UNPACK = [bytes((value >> bit) & 1 for bit in range(8)) for value in range(256)]
+_MASK64 = (1 << 64) - 1
+
+
+class MazeFormatError(ValueError):
+    pass
+
+
+def pack_cells(cells):
+    """Pack one-byte-per-cell walls into one bit per cell"""
+    padded = bytes(cells) + bytes(-len(cells) % 8)
+    # The multiply gathers the low bit of each of the eight bytes into the top byte
+    return bytes(((word * 0x0102040810204080) & _MASK64) >> 56
+                 for word in memoryview(padded).cast("Q"))
+
+
+def unpack_cells(data, count):
+    """Expand ``count`` bit-packed cells back into a ``bytearray``"""
+    cells = bytearray(b"".join(map(_UNPACK.__getitem__, data)))
+    del cells[count:]
+    return cells
+
+
+class PackedMazeGrid:
+    """Read-only ``MazeGrid`` look-alike over bit-packed cells.
+
+    ``data`` is any buffer, typically an ``mmap`` of a maze file, and cells
+    are tested in place. ``cells`` unpacks the whole grid once on first
+    access, for solvers that need the flat byte-per-cell layout.
+    """
+
+    def __init__(self, width, height, data, offset=0):
+        self.width = width
+        self.height = height
+        self.data = data
+        self.offset = offset
+        self._cells = None
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        y = range(self.height)[y]
+        start = y * self.width
+        return [self.cell(start + x) for x in range(self.width)]
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield self[y]
+
+    def cell(self, index):
+        """Wall flag of flat cell ``index``"""
+        return self.data[self.offset + (index >> 3)] >> (index & 7) & 1
+
+    def is_open(self, x, y):
+        """Return True if (x, y) is inside the grid and not a wall"""
+        return (0 <= x < self.width and 0 <= y < self.height and
+                self.cell(y * self.width + x) == PATH)
+
+    @property
+    def cells(self):
+        if self._cells is None:
+            count = self.width * self.height
+            self._cells = unpack_cells(self.data[self.offset:self.offset + (count + 7) // 8], count)
+        return self._cells
+
+    def to_grid(self):
+        """Copy into a writable ``MazeGrid``"""
+        return MazeGrid(self.width, self.height, cells=bytearray(self.cells))
+
+
+def save_level(path, level):
+    """Write ``level`` to ``path`` in the current format version"""
+    maze = level.maze
+    algorithm = level.key[0].encode("ascii")
+    if len(algorithm) > 19:
+        raise MazeFormatError(f"algorithm name {level.key[0]!r} is longer than 19 characters")
+
+    header = HEADER.pack(MAGIC, VERSION, ENCODING_BITS, 0, maze.width, maze.height, level.seed,
+                         *level.start, *level.end, max(0, level.optimal_moves),
+                         len(algorithm), algorithm)
+    with open(path, "wb") as stream:
+        stream.write(header)
+        stream.write(pack_cells(maze.cells))
+
+
+def read_header(buffer):
+    """Parse and validate a maze file header"""
+    if len(buffer) < HEADER.size:
+        raise MazeFormatError("file is too short for a maze header")
+    (magic, version, encoding, _, width, height, seed, start_x, start_y, end_x, end_y,
+     optimal_moves, name_length, name) = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise MazeFormatError("not a maze file")
+    if version != VERSION:
+        raise MazeFormatError(f"unsupported maze file version {version}")
+    if encoding != ENCODING_BITS:
+        raise MazeFormatError(f"unsupported cell encoding {encoding}")
+    if width < 3 or height < 3:
+        raise MazeFormatError(f"maze of {width}x{height} cells is too small")
+    for label, x, y in (("start", start_x, start_y), ("end", end_x, end_y)):
+        if x >= width or y >= height:
+            raise MazeFormatError(f"{label} ({x}, {y}) is outside the {width}x{height} maze")
+    if len(buffer) < HEADER.size + (width * height + 7) // 8:
+        raise MazeFormatError("maze file is truncated")
+
+    return {
+        "width": width,
+        "height": height,
+        "seed": seed,
+        "start": (start_x, start_y),
+        "end": (end_x, end_y),
+        "optimal_moves": optimal_moves,
+        "algorithm": name[:name_length].decode("ascii"),
+    }
+
+
+def load_level(path):
+    """Memory-map a maze file and return it as a ``Level``.
+
+    No cells are copied: the level's maze is a ``PackedMazeGrid`` over the
+    mapping, and its distance field is left for the session to build when
+    a hint or score first needs it.
+    """
+    with open(path, "rb") as stream:
+        # mmap refuses empty files, and a short one has no header to map
+        if os.fstat(stream.fileno()).st_size < HEADER.size:
+            raise MazeFormatError("file is too short for a maze header")
+        data = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    header = read_header(data)
+
+    maze = PackedMazeGrid(header["width"], header["height"], data, HEADER.size)
+    key = (header["algorithm"], header["width"], header["seed"])
+    return Level(maze, key, start=header["start"], end=header["end"],
+                 optimal_moves=header["optimal_moves"] or None)
@@ -0,0 +1,52 @@
+"""Compact grid storage shared by the generator, player and renderer."""
+
+WALL = 1
+PATH = 0
+
+
+class MazeGrid:
+    """Maze cells stored row-major in a flat ``bytearray``, one byte per cell.
+
+    A cell is ``WALL`` (1) or ``PATH`` (0) and lives at ``cells[y * width + x]``.
+    ``grid[y][x]`` still works for older code: indexing a row returns a
+    ``memoryview`` slice, so reads and writes go straight to the shared buffer.
+    """
+    __slots__ = ("width", "height", "cells")
+
+    def __init__(self, width, height, fill=WALL, cells=None):
+        self.width = width
+        self.height = height
+        if cells is None:
+            cells = bytearray([fill]) * (width * height)
+        elif len(cells) != width * height:
+            raise ValueError(f"expected {width * height} cells, got {len(cells)}")
+        self.cells = cells
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        y = range(self.height)[y]
+        start = y * self.width
+        return memoryview(self.cells)[start:start + self.width]
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield self[y]
+
+    def is_open(self, x, y):
+        """Return True if (x, y) is inside the grid and not a wall"""
+        return (0 <= x < self.width and 0 <= y < self.height and
+                self.cells[y * self.width + x] == PATH)
+
+    def to_list(self):
+        """Copy the grid into a list of row lists"""
+        return [list(row) for row in self]
+
+    def as_array(self):
+        """Return a zero-copy NumPy ``uint8`` view of shape (height, width).
+
+        NumPy is optional and only imported when this is called.
+        """
+        import numpy as np
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(self.height, self.width)
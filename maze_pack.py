@@ -0,0 +1,172 @@
+"""Build packs of vetted maze files from the command line.
+
+    python maze_pack.py packs/hard --count 20000 --size 35 --algorithm dfs
+
+Seeds ``--first-seed`` onwards are split into chunks and built by a pool of
+worker processes, one per core by default. Each worker generates its mazes
+with ``MazeGenerator``, rejects any that fail validation or the
+``--min-moves``/``--min-tortuosity`` filters, and writes the rest straight
+to ``level-<seed>.maze`` files with ``save_level``. Only a small index
+record per level travels back to the parent, which appends it to
+``index.jsonl`` as each chunk finishes. Memory therefore stays flat however
+big the pack is. With NumPy installed each record also carries the
+``maze_analytics`` metrics. Records are appended, so several seed ranges
+can be built into one pack.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from maze_algorithms import ALGORITHMS
+from maze_core import Level, MazeGenerator
+from maze_format import save_level
+from maze_grid import WALL
+from maze_solver import DistanceField
+
+try:
+    from maze_analytics import analyze
+except ImportError:  # NumPy is optional
+    analyze = None
+
+# Seeds are stored as an unsigned 64-bit field in the .maze header
+MAX_SEED = 2 ** 64 - 1
+
+
+def validate(maze, start, end, distance_field):
+    """Reason ``maze`` is unusable, or None if every open cell reaches the exit"""
+    if not maze.is_open(*start) or not maze.is_open(*end):
+        return "start or end is a wall"
+    if distance_field.distance(*start) < 0:
+        return "exit unreachable"
+    # Walls are the only cells the exit may not reach
+    if distance_field.distances.count(-1) != maze.cells.count(WALL):
+        return "disconnected cells"
+    return None
+
+
+def build_chunk(directory, size, algorithm, seeds, min_moves=0, min_tortuosity=0.0):
+    """Build, vet and save one chunk of levels; returns index records and rejections"""
+    records = []
+    grids = []
+    rejected = {}
+    for seed in seeds:
+        maze = MazeGenerator(size, size, algorithm, seed).generate_maze()
+        start, end = (1, 1), (size - 2, size - 2)
+        distance_field = DistanceField(maze, end)
+        reason = validate(maze, start, end, distance_field)
+        level = Level(maze, (algorithm, size, seed), start=start, end=end,
+                      distance_field=distance_field)
+        tortuosity = level.optimal_moves / (end[0] - start[0] + end[1] - start[1])
+        if reason is None and level.optimal_moves < min_moves:
+            reason = "too short"
+        if reason is None and tortuosity < min_tortuosity:
+            reason = "too straight"
+        if reason:
+            rejected[reason] = rejected.get(reason, 0) + 1
+            continue
+
+        name = f"level-{seed:010d}.maze"
+        save_level(os.path.join(directory, name), level)
+        records.append({"file": name, "seed": seed, "size": size, "algorithm": algorithm,
+                        "optimal_moves": level.optimal_moves, "tortuosity": round(tortuosity, 4)})
+        grids.append(maze)
+
+    if analyze is not None and grids:
+        metrics = analyze(grids)
+        for index, record in enumerate(records):
+            for name, values in metrics.items():
+                record.setdefault(name, values[index].item())
+    return records, rejected
+
+
+def build_pack(directory, count, size, algorithm="dfs", first_seed=0, workers=None, chunk_size=256,
+               min_moves=0, min_tortuosity=0.0, log=None):
+    """Build ``count`` seeds into ``directory``; returns a summary dict.
+
+    At most two chunks per worker are in flight, so finished results are
+    written out before more work is queued. Raises ValueError before any
+    file is written if a seed in the range cannot be saved.
+    """
+    if first_seed < 0 or first_seed + count - 1 > MAX_SEED:
+        raise ValueError(f"seeds {first_seed}..{first_seed + count - 1} do not fit in 0..{MAX_SEED}")
+    os.makedirs(directory, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    chunks = iter(range(first_seed + start, first_seed + min(start + chunk_size, count))
+                  for start in range(0, count, chunk_size))
+    filters = (min_moves, min_tortuosity)
+
+    written = 0
+    rejected = {}
+    started = time.perf_counter()
+    with open(os.path.join(directory, "index.jsonl"), "a") as index, \
+            ProcessPoolExecutor(max_workers=workers,
+                                mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending = set()
+        while True:
+            for seeds in chunks:
+                pending.add(executor.submit(build_chunk, directory, size, algorithm, seeds, *filters))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                records, chunk_rejected = future.result()
+                for record in records:
+                    index.write(json.dumps(record) + "\n")
+                index.flush()
+                written += len(records)
+                for reason, number in chunk_rejected.items():
+                    rejected[reason] = rejected.get(reason, 0) + number
+
+            if log:
+                elapsed = time.perf_counter() - started
+                built = written + sum(rejected.values())
+                log(f"{built}/{count} built, {written} kept, "
+                    f"{built / elapsed:.0f} levels/s, {built * size * size / elapsed / 1e6:.1f}M cells/s")
+
+    elapsed = time.perf_counter() - started
+    return {"written": written, "rejected": rejected, "seconds": elapsed,
+            "levels_per_second": count / elapsed if elapsed else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("directory", help="output directory for the .maze files and index.jsonl")
+    parser.add_argument("--count", type=int, required=True, help="number of seeds to build")
+    parser.add_argument("--size", type=int, default=35, help="maze width and height (odd)")
+    parser.add_argument("--algorithm", default="dfs", choices=sorted(ALGORITHMS))
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--chunk", type=int, default=256, help="seeds per unit of work")
+    parser.add_argument("--min-moves", type=int, default=0, help="reject shorter solutions")
+    parser.add_argument("--min-tortuosity", type=float, default=0.0,
+                        help="reject mazes whose solution is less than this times the straight distance")
+    args = parser.parse_args(argv)
+
+    if args.size < 5 or args.size % 2 == 0:
+        parser.error("--size must be an odd number of at least 5")
+    if args.count < 1 or args.chunk < 1:
+        parser.error("--count and --chunk must be positive")
+    if args.first_seed < 0 or args.first_seed + args.count - 1 > MAX_SEED:
+        parser.error(f"--first-seed and --count must keep every seed within 0..{MAX_SEED}")
+    if analyze is None:
+        print("NumPy is not installed; index records will not include analytics", file=sys.stderr)
+
+    summary = build_pack(args.directory, args.count, args.size, args.algorithm, args.first_seed,
+                         args.workers, args.chunk, args.min_moves, args.min_tortuosity,
+                         log=lambda message: print(message, file=sys.stderr))
+    print(f"wrote {summary['written']} levels to {args.directory} in {summary['seconds']:.1f}s "
+          f"({summary['levels_per_second']:.0f} levels/s)")
+    for reason, number in sorted(summary["rejected"].items()):
+        print(f"rejected {number}: {reason}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Background pre-generation of upcoming levels."""
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from maze_core import build_level
+from maze_solver import DistanceField
+
+
+def level_config(difficulty):
+    """The parts of a difficulty that decide which mazes it produces"""
+    return difficulty["size"], difficulty.get("algorithm", "dfs")
+
+
+class MazePrefetcher:
+    """Keeps the next ``depth`` levels for one difficulty building in the background.
+
+    ``pop()`` hands out the oldest queued level in O(1) and tops the queue
+    back up. A level that was already finished counts as a hit. A level
+    still being built, or a synchronous build because the queue was empty,
+    counts as a miss. Changing the difficulty drops the queued levels.
+
+    Threads are the default. ``use_processes=True`` builds in spawned
+    worker processes instead, which keeps big mazes from competing with the
+    game loop for the GIL.
+
+    ``solve()`` builds distance fields for levels loaded from disk on a
+    separate thread. Those mazes are memory-mapped and cannot be sent to a
+    worker process.
+    """
+
+    def __init__(self, depth=2, workers=1, use_processes=False):
+        self.depth = depth
+        if use_processes:
+            self.executor = ProcessPoolExecutor(max_workers=workers,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="maze-prefetch")
+        self.queue = deque()
+        self.config = None
+        self.difficulty = None
+        self.hits = 0
+        self.misses = 0
+        self.solver = None
+
+    def fill(self, difficulty):
+        """Start building levels for ``difficulty`` until ``depth`` are queued"""
+        if difficulty.get("endless"):
+            # Endless corridors are carved as the player descends; nothing to build ahead
+            return
+        config = level_config(difficulty)
+        if config != self.config:
+            for future in self.queue:
+                future.cancel()
+            self.queue.clear()
+            self.config = config
+            self.difficulty = dict(difficulty)
+
+        while len(self.queue) < self.depth:
+            self.queue.append(self.executor.submit(build_level, self.difficulty))
+
+    def pop(self, difficulty):
+        """Return the next level for ``difficulty``, building it here only if none is queued"""
+        if level_config(difficulty) == self.config and self.queue:
+            future = self.queue.popleft()
+            if future.done():
+                self.hits += 1
+            else:
+                self.misses += 1
+            level = future.result()
+        else:
+            self.misses += 1
+            level = build_level(difficulty)
+
+        self.fill(difficulty)
+        return level
+
+    def solve(self, maze, end):
+        """Start building the distance field to ``end``; returns its future"""
+        if self.solver is None:
+            self.solver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="maze-solve")
+        return self.solver.submit(DistanceField, maze, end)
+
+    def ready(self):
+        """Number of queued levels that are finished"""
+        return sum(1 for future in self.queue if future.done())
+
+    def stats(self):
+        """Queue depth and hit/miss counters"""
+        return {"queued": len(self.queue), "ready": self.ready(),
+                "hits": self.hits, "misses": self.misses}
+
+    def shutdown(self):
+        """Cancel pending builds and stop the workers"""
+        for future in self.queue:
+            future.cancel()
+        self.queue.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.solver is not None:
+            self.solver.shutdown(wait=False, cancel_futures=True)
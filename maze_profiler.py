@@ -0,0 +1,90 @@
+"""Opt-in frame and operation timing for the game loop."""
+import csv
+import time
+from collections import deque
+
+PHASES = ("events", "update", "draw", "present", "tick")
+
+
+class FrameProfiler:
+    """Times each phase of every frame plus one-off operations such as generation.
+
+    Nothing is recorded while ``enabled`` is False. The game loop reads the
+    flag once per frame and skips every call, so a disabled profiler costs
+    one attribute lookup per frame. The last ``window`` frames feed the
+    rolling FPS and percentiles. The last ``history_limit`` frames (ten
+    minutes at 60 FPS by default) are also kept for ``dump_csv``.
+    """
+
+    def __init__(self, enabled=False, window=300, history_limit=36000):
+        self.enabled = enabled
+        self.frames = deque(maxlen=window)
+        self.history = deque(maxlen=history_limit)
+        self.operations = {}
+        self.frame_index = 0
+        self._frame = None
+        self._last = 0.0
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frames.clear()
+
+    def begin_frame(self):
+        self._frame = {}
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """Close ``phase``, timed from the previous mark or the frame start"""
+        now = time.perf_counter()
+        self._frame[phase] = now - self._last
+        self._last = now
+
+    def end_frame(self):
+        frame = self._frame
+        frame["work"] = sum(frame.get(phase, 0.0) for phase in PHASES if phase != "tick")
+        frame["total"] = frame["work"] + frame.get("tick", 0.0)
+        self.frames.append(frame)
+        self.history.append((self.frame_index, frame))
+        self.frame_index += 1
+
+    def record_operation(self, name, seconds):
+        """Remember the latest duration of a one-off operation such as ``generate``"""
+        self.operations[name] = seconds
+
+    def fps(self):
+        total = sum(frame["total"] for frame in self.frames)
+        return len(self.frames) / total if total else 0.0
+
+    def percentile(self, fraction, key="work"):
+        """Frame time in seconds below which ``fraction`` of recent frames fall"""
+        values = sorted(frame.get(key, 0.0) for frame in self.frames)
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+
+    def overlay_lines(self):
+        """Short text lines summarising recent frames for the UI panel"""
+        lines = [
+            f"FPS {self.fps():.1f}",
+            "p50 {:.1f} p95 {:.1f} p99 {:.1f} ms".format(
+                *(1000 * self.percentile(fraction) for fraction in (0.5, 0.95, 0.99))),
+        ]
+        if self.frames:
+            latest = self.frames[-1]
+            lines.append(" ".join(f"{phase[:2]} {1000 * latest.get(phase, 0.0):.1f}"
+                                  for phase in PHASES if phase != "tick"))
+        if self.operations:
+            lines.append(" ".join(f"{name} {1000 * seconds:.1f}ms"
+                                  for name, seconds in self.operations.items()))
+        return lines
+
+    def dump_csv(self, path):
+        """Write one row per recorded frame with per-phase times in milliseconds"""
+        columns = PHASES + ("work", "total")
+        with open(path, "w", newline="") as stream:
+            writer = csv.writer(stream)
+            writer.writerow(("frame",) + tuple(f"{column}_ms" for column in columns))
+            for index, frame in self.history:
+                writer.writerow((index,) + tuple(f"{1000 * frame.get(column, 0.0):.3f}"
+                                                 for column in columns))
+        return len(self.history)
@@ -0,0 +1,269 @@
+"""Compact input logs of finished runs, and fast headless verification.
+
+A replay is everything needed to re-run a game: which maze (algorithm,
+size and seed), the difficulty it was scored under, the claimed time and
+every attempted move. Moves are 2-bit ``DIRECTION_CODES``, four to a
+byte, so a 500-move run takes 177 bytes.
+
+Layout (little-endian), version 1::
+
+    offset  size  field
+    0       4     magic b"MZRP"
+    4       1     format version
+    5       1     difficulty, index into Difficulty.PRESETS
+    6       1     algorithm name length
+    7       1     reserved, zero
+    8       4     maze size
+    12      8     seed
+    20      8     elapsed time in seconds, float64
+    28      4     number of moves
+    32      19    algorithm name, ASCII, zero padded
+    51      1     reserved, zero
+    52      ...   moves, move i in bits 2 * (i % 4) of byte i // 4
+
+``verify_replays`` re-runs thousands of logs across a process pool. Each
+worker regenerates a maze once per seed and replays moves with a flat-index
+loop over the maze cells, at several million moves per second.
+"""
+import math
+import multiprocessing
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from maze_algorithms import ALGORITHMS
+from maze_core import DIRECTIONS, Difficulty, GameState, MazeSession, build_level
+from maze_grid import WALL
+
+MAGIC = b"MZRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBxIQdI19sx")
+# No keyboard run can press keys faster than this; faster logs are forged
+MAX_MOVES_PER_SECOND = 60
+
+# Byte value -> the four direction codes it holds
+_UNPACK = [bytes((value >> shift) & 3 for shift in (0, 2, 4, 6)) for value in range(256)]
+
+
+class ReplayError(ValueError):
+    pass
+
+
+def pack_moves(codes):
+    """Pack one-byte direction codes four to a byte"""
+    codes = bytes(codes) + bytes(-len(codes) % 4)
+    return bytes(a | b << 2 | c << 4 | d << 6
+                 for a, b, c, d in zip(codes[0::4], codes[1::4], codes[2::4], codes[3::4]))
+
+
+def unpack_moves(data, count):
+    """Expand ``count`` packed moves back into one code per byte"""
+    return b"".join(map(_UNPACK.__getitem__, data))[:count]
+
+
+class Replay:
+    """The recorded inputs of one run on a regenerable maze"""
+
+    def __init__(self, algorithm, size, seed, preset, elapsed, moves):
+        self.algorithm = algorithm
+        self.size = size
+        self.seed = seed
+        self.preset = preset
+        self.elapsed = elapsed
+        self.moves = bytes(moves)
+
+    @classmethod
+    def from_session(cls, session):
+        """Record the run ``session`` just finished (or is still playing)"""
+        algorithm, size, seed = session.level_key
+        if session.end is None:
+            raise ReplayError("endless corridors have no exit to verify")
+        if not session.ranked:
+            raise ReplayError(f"unranked {size}x{size} level has no difficulty to verify against")
+        names = [preset["name"] for preset in Difficulty.PRESETS]
+        end_time = session.end_time or session.now()
+        return cls(algorithm, size, seed, names.index(session.difficulty["name"]),
+                   end_time - session.start_time, session.inputs)
+
+    @property
+    def difficulty(self):
+        return Difficulty.with_algorithm(Difficulty.PRESETS[self.preset], self.algorithm)
+
+    def encode(self):
+        algorithm = self.algorithm.encode("ascii")
+        if len(algorithm) > 19:
+            raise ReplayError(f"algorithm name {self.algorithm!r} is longer than 19 characters")
+        header = HEADER.pack(MAGIC, VERSION, self.preset, len(algorithm), self.size, self.seed,
+                             self.elapsed, len(self.moves), algorithm)
+        return header + pack_moves(self.moves)
+
+    @classmethod
+    def decode(cls, buffer):
+        if len(buffer) < HEADER.size:
+            raise ReplayError("too short for a replay header")
+        (magic, version, preset, name_length, size, seed, elapsed, count,
+         name) = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ReplayError("not a replay")
+        if version != VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        if preset >= len(Difficulty.PRESETS):
+            raise ReplayError(f"unknown difficulty {preset}")
+        if not math.isfinite(elapsed) or elapsed < 0:
+            raise ReplayError(f"invalid elapsed time {elapsed!r}")
+        if len(buffer) < HEADER.size + (count + 3) // 4:
+            raise ReplayError("replay is truncated")
+        try:
+            algorithm = name[:name_length].decode("ascii")
+        except UnicodeDecodeError:
+            raise ReplayError("algorithm name is not ASCII") from None
+        moves = unpack_moves(memoryview(buffer)[HEADER.size:HEADER.size + (count + 3) // 4], count)
+        return cls(algorithm, size, seed, preset, elapsed, moves)
+
+
+@lru_cache(maxsize=64)
+def cached_level(algorithm, size, seed):
+    """Build a level once per worker; a day's runs mostly share a few seeds"""
+    return build_level({"size": size, "algorithm": algorithm}, seed)
+
+
+def walled_in(maze):
+    """True if the outer ring of cells is all wall"""
+    cells = maze.cells
+    width = maze.width
+    return (all(cells[:width]) and all(cells[-width:]) and
+            all(cells[::width]) and all(cells[width - 1::width]))
+
+
+def walk(maze, start, end, moves):
+    """Apply direction codes from ``start`` until the player reaches ``end``.
+
+    Does what ``Player.move`` does for each code, on flat cell indices.
+    Only valid for mazes that are ``walled_in``: the outer wall ring keeps
+    every step inside the grid. Returns ``(moves made, moves used, final
+    flat index)``.
+    """
+    width = maze.width
+    cells = maze.cells
+    offsets = tuple(dy * width + dx for dx, dy in DIRECTIONS)
+    position = start[1] * width + start[0]
+    goal = end[1] * width + end[0]
+    made = used = 0
+    for offset in map(offsets.__getitem__, moves):
+        used += 1
+        target = position + offset
+        if cells[target] != WALL:
+            position = target
+            made += 1
+            if position == goal:
+                break
+    return made, used, position
+
+
+def replay_session(replay, level):
+    """A session on ``level`` whose clock reads the replay's end time once started"""
+    clock = [1.0]  # calculate_score ignores a zero start time
+    session = MazeSession(replay.difficulty, now=lambda: clock[0])
+    session.start_level(level)
+    clock[0] += replay.elapsed
+    return session
+
+
+def play(session, moves):
+    """Play ``moves`` through ``session`` one at a time.
+
+    The slow reference path: every move goes through ``Player.move`` and
+    ``check_win_condition``. Returns how many moves were used.
+    """
+    for used, code in enumerate(moves, 1):
+        session.move(*DIRECTIONS[code])
+        if session.check_win_condition():
+            return used
+    return len(moves)
+
+
+def verify(replay):
+    """Re-run one replay and report whether it reached the exit, and its score"""
+    result = {"seed": replay.seed, "valid": False, "moves": 0, "score": 0, "error": None}
+    preset = Difficulty.PRESETS[replay.preset]
+    if replay.algorithm not in ALGORITHMS:
+        result["error"] = f"unknown algorithm {replay.algorithm!r}"
+        return result
+    if preset.get("endless"):
+        result["error"] = f"{preset['name']} runs have no exit to verify"
+        return result
+    # The difficulty bonus is only earned on mazes of the difficulty's size
+    if replay.size != preset["size"]:
+        result["error"] = f"maze size {replay.size} does not match {preset['name']}"
+        return result
+    if len(replay.moves) > replay.elapsed * MAX_MOVES_PER_SECOND:
+        result["error"] = "faster than any keyboard"
+        return result
+
+    level = cached_level(replay.algorithm, replay.size, replay.seed)
+    session = replay_session(replay, level)
+    if walled_in(level.maze):
+        made, used, position = walk(level.maze, level.start, level.end, replay.moves)
+        # Score the outcome with the session's own win check
+        session.moves = made
+        session.player.y, session.player.x = divmod(position, level.maze.width)
+        session.check_win_condition()
+    else:
+        used = play(session, replay.moves)
+
+    result["moves"] = session.moves
+    if session.state != GameState.GAME_OVER:
+        result["error"] = "never reached the exit"
+    elif used < len(replay.moves):
+        result["error"] = "moves continue after the exit"
+    else:
+        result["valid"] = True
+        result["score"] = session.score
+    return result
+
+
+def verify_encoded(blobs):
+    """Decode and verify a batch of encoded replays; the process pool's unit of work
+
+    Blobs come from clients, so any failure is reported against the one
+    replay that caused it rather than aborting the batch.
+    """
+    results = []
+    for blob in blobs:
+        try:
+            results.append(verify(Replay.decode(blob)))
+        except ReplayError as error:
+            results.append({"seed": None, "valid": False, "moves": 0, "score": 0, "error": str(error)})
+        except Exception as error:
+            results.append({"seed": None, "valid": False, "moves": 0, "score": 0,
+                            "error": f"verification failed: {error!r}"})
+    return results
+
+
+def verify_replays(replays, workers=None, batch_size=256):
+    """Verify encoded replays (``bytes``) in parallel; results keep the input order.
+
+    Runs are grouped by level before batching so each worker regenerates
+    as few mazes as possible. ``workers=0`` verifies in this process.
+    """
+    replays = list(replays)
+    # The seed sits at a fixed offset, so grouping needs no full decode
+    order = sorted(range(len(replays)), key=lambda i: (replays[i][8:20], replays[i][32:51]))
+    batches = [[replays[i] for i in order[start:start + batch_size]]
+               for start in range(0, len(order), batch_size)]
+
+    if workers == 0:
+        batch_results = map(verify_encoded, batches)
+        return reorder(order, batch_results, len(replays))
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        return reorder(order, executor.map(verify_encoded, batches), len(replays))
+
+
+def reorder(order, batch_results, count):
+    results = [None] * count
+    flat = (result for batch in batch_results for result in batch)
+    for index, result in zip(order, flat):
+        results[index] = result
+    return results
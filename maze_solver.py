@@ -0,0 +1,266 @@
+"""Shortest-path solvers for mazes built on ``MazeGrid``.
+
+Positions are ``(x, y)`` tuples and every solver returns the path as a list
+of positions from ``start`` to ``goal`` inclusive, or None when the goal
+cannot be reached. Internally cells are flat indices into ``grid.cells``.
+"""
+import heapq
+from array import array
+from collections import deque
+
+from maze_grid import PATH, WALL, MazeGrid
+
+SOLVERS = {}
+
+
+def register_solver(name):
+    """Decorator that adds a solver to ``SOLVERS`` under ``name``"""
+    def decorator(func):
+        SOLVERS[name] = func
+        return func
+    return decorator
+
+
+def open_neighbours(cells, width, index):
+    """Flat indices of the open cells next to ``index``"""
+    x = index % width
+    if x + 1 < width and cells[index + 1] == PATH:
+        yield index + 1
+    if x and cells[index - 1] == PATH:
+        yield index - 1
+    below = index + width
+    if below < len(cells) and cells[below] == PATH:
+        yield below
+    above = index - width
+    if above >= 0 and cells[above] == PATH:
+        yield above
+
+
+def bfs_distances(grid, source, stop=None):
+    """Breadth-first distances in moves from ``source`` to every open cell.
+
+    Returns an ``array('i')`` indexed by flat cell index, with -1 for walls
+    and unreachable cells. The search ends early once ``stop`` is reached.
+    """
+    width = grid.width
+    cells = grid.cells
+    size = len(cells)
+    distances = array("i", [-1]) * size
+
+    origin = source[1] * width + source[0]
+    if cells[origin] != PATH:
+        return distances
+    target = -1 if stop is None else stop[1] * width + stop[0]
+
+    distances[origin] = 0
+    queue = deque([origin])
+    while queue:
+        index = queue.popleft()
+        if index == target:
+            break
+        step = distances[index] + 1
+        x = index % width
+        for n in (index + 1 if x + 1 < width else -1, index - 1 if x else -1,
+                  index + width, index - width):
+            if 0 <= n < size and cells[n] == PATH and distances[n] < 0:
+                distances[n] = step
+                queue.append(n)
+    return distances
+
+
+def descend(distances, width, start):
+    """Follow strictly decreasing distances from ``start`` down to zero"""
+    index = start[1] * width + start[0]
+    remaining = distances[index]
+    if remaining < 0:
+        return None
+
+    size = len(distances)
+    path = [start]
+    while remaining:
+        remaining -= 1
+        x = index % width
+        for n in (index + 1 if x + 1 < width else -1, index - 1 if x else -1,
+                  index + width, index - width):
+            if 0 <= n < size and distances[n] == remaining:
+                index = n
+                break
+        path.append((index % width, index // width))
+    return path
+
+
+@register_solver("bfs")
+def bfs(grid, start, goal):
+    """Breadth-first search. O(N) time, 4 bytes per cell of distances."""
+    distances = bfs_distances(grid, goal, stop=start)
+    return descend(distances, grid.width, start)
+
+
+@register_solver("astar")
+def astar(grid, start, goal):
+    """A* with the Manhattan distance heuristic.
+
+    Explores towards the goal first, so open areas solve faster than BFS.
+    O(N log N) worst case; parents and costs are kept in dicts sized by
+    the explored region rather than the whole grid.
+    """
+    width = grid.width
+    cells = grid.cells
+    origin = start[1] * width + start[0]
+    target = goal[1] * width + goal[0]
+    if cells[origin] != PATH or cells[target] != PATH:
+        return None
+    goal_x, goal_y = goal
+
+    costs = {origin: 0}
+    parents = {origin: -1}
+    heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, origin)]
+    while heap:
+        _, cost, index = heapq.heappop(heap)
+        if index == target:
+            break
+        if cost > costs[index]:
+            continue
+        cost += 1
+        for n in open_neighbours(cells, width, index):
+            if cost < costs.get(n, cost + 1):
+                costs[n] = cost
+                parents[n] = index
+                y, x = divmod(n, width)
+                heapq.heappush(heap, (cost + abs(x - goal_x) + abs(y - goal_y), cost, n))
+    else:
+        return None
+
+    path = []
+    index = target
+    while index >= 0:
+        path.append((index % width, index // width))
+        index = parents[index]
+    path.reverse()
+    return path
+
+
+@register_solver("bidirectional")
+def bidirectional_bfs(grid, start, goal):
+    """Breadth-first search from both ends, always growing the smaller frontier.
+
+    Visits roughly half the cells of a one-sided BFS on long corridors.
+    O(N) time; memory is proportional to the explored region.
+    """
+    width = grid.width
+    cells = grid.cells
+    origin = start[1] * width + start[0]
+    target = goal[1] * width + goal[0]
+    if cells[origin] != PATH or cells[target] != PATH:
+        return None
+
+    forward = {origin: -1}
+    backward = {target: -1}
+    forward_frontier = [origin]
+    backward_frontier = [target]
+    meet = origin if origin == target else -1
+
+    while meet < 0 and forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, seen, other = forward_frontier, forward, backward
+        else:
+            frontier, seen, other = backward_frontier, backward, forward
+
+        next_frontier = []
+        for index in frontier:
+            for n in open_neighbours(cells, width, index):
+                if n in seen:
+                    continue
+                seen[n] = index
+                if n in other:
+                    meet = n
+                    break
+                next_frontier.append(n)
+            if meet >= 0:
+                break
+
+        if frontier is forward_frontier:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    if meet < 0:
+        return None
+
+    path = []
+    index = meet
+    while index >= 0:
+        path.append((index % width, index // width))
+        index = forward[index]
+    path.reverse()
+    index = backward[meet]
+    while index >= 0:
+        path.append((index % width, index // width))
+        index = backward[index]
+    return path
+
+
+@register_solver("dead_end_fill")
+def dead_end_fill(grid, start, goal):
+    """Dead-end filling: wall up dead ends until only solution corridors remain.
+
+    O(N) time and one byte per cell for the filled copy. In a perfect maze
+    what is left is exactly the solution; otherwise a BFS over the remaining
+    cells picks the shortest route through any loops.
+    """
+    width = grid.width
+    filled = bytearray(grid.cells)
+    keep = {start[1] * width + start[0], goal[1] * width + goal[0]}
+
+    degree = bytearray(len(filled))
+    queue = deque()
+    for index, cell in enumerate(filled):
+        if cell == PATH:
+            degree[index] = sum(1 for _ in open_neighbours(filled, width, index))
+            if degree[index] <= 1 and index not in keep:
+                queue.append(index)
+
+    while queue:
+        index = queue.popleft()
+        if filled[index] != PATH:
+            continue
+        filled[index] = WALL
+        for n in open_neighbours(filled, width, index):
+            degree[n] -= 1
+            if degree[n] <= 1 and n not in keep:
+                queue.append(n)
+
+    return bfs(MazeGrid(grid.width, grid.height, cells=filled), start, goal)
+
+
+class DistanceField:
+    """Moves-to-goal for every cell, computed once per maze.
+
+    Distances are stored in a flat ``array('i')`` (4 bytes per cell, -1 for
+    walls and unreachable cells), so hint and remaining-moves lookups are
+    O(1) instead of a fresh search.
+    """
+
+    def __init__(self, grid, goal):
+        self.width = grid.width
+        self.goal = goal
+        self.distances = bfs_distances(grid, goal)
+
+    def distance(self, x, y):
+        """Moves from (x, y) to the goal, or -1 if it cannot be reached"""
+        return self.distances[y * self.width + x]
+
+    def next_step(self, x, y):
+        """The neighbouring cell one move closer to the goal, or None"""
+        remaining = self.distance(x, y)
+        if remaining <= 0:
+            return None
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if (0 <= nx < self.width and 0 <= ny * self.width + nx < len(self.distances)
+                    and self.distance(nx, ny) == remaining - 1):
+                return nx, ny
+        return None
+
+    def path_from(self, x, y):
+        """Shortest path from (x, y) to the goal"""
+        return descend(self.distances, self.width, (x, y))
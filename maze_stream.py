@@ -0,0 +1,92 @@
+"""Unbounded "infinite corridor" mazes generated lazily in tiles."""
+import random
+from collections import OrderedDict
+
+from maze_algorithms import eller_rows
+from maze_grid import PATH, MazeGrid
+
+
+class InfiniteMaze:
+    """Maze ``width`` cells wide that extends downwards without limit.
+
+    The corridor is cut into tiles of ``tile_rooms`` room rows. Each tile is
+    a complete Eller's maze carved from a generator seeded by ``(seed, tile
+    index)``. It is joined to the tile above through one seeded opening in
+    its top wall row. The whole corridor is therefore a perfect maze, and
+    any tile can be rebuilt on its own. At most ``cache_size`` tiles stay in
+    memory, and the least recently used one is evicted first. Memory is
+    flat however far the player travels.
+
+    Cells are addressed like a ``MazeGrid``; ``height`` is None.
+    """
+
+    def __init__(self, width, seed=None, tile_rooms=16, cache_size=8):
+        if width < 3 or width % 2 == 0:
+            raise ValueError("width must be an odd number of at least 3 cells")
+        self.width = width
+        self.height = None
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.tile_rooms = tile_rooms
+        self.tile_height = 2 * tile_rooms
+        self.cache_size = cache_size
+        self.tiles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def tile(self, index):
+        """Return tile ``index``, generating it and evicting old tiles as needed"""
+        grid = self.tiles.get(index)
+        if grid is not None:
+            self.tiles.move_to_end(index)
+            self.hits += 1
+            return grid
+
+        self.misses += 1
+        grid = self.build_tile(index)
+        self.tiles[index] = grid
+        if len(self.tiles) > self.cache_size:
+            self.tiles.popitem(last=False)
+        return grid
+
+    def build_tile(self, index):
+        """Carve tile ``index``; row 0 is the wall row shared with the tile above"""
+        rng = random.Random((self.seed << 32) + index)
+        width = self.width
+        rooms_x = (width - 1) // 2
+        grid = MazeGrid(width, self.tile_height)
+        cells = grid.cells
+
+        for ry, (east, south) in enumerate(eller_rows(rooms_x, self.tile_rooms, rng)):
+            row = (2 * ry + 1) * width + 1
+            for rx in range(rooms_x):
+                cells[row + 2 * rx] = PATH
+                if east[rx]:
+                    cells[row + 2 * rx + 1] = PATH
+                if south[rx]:
+                    cells[row + 2 * rx + width] = PATH
+
+        # One opening into the tile above keeps the corridor a single tree
+        if index > 0:
+            cells[2 * rng.randrange(rooms_x) + 1] = PATH
+
+        return grid
+
+    def prefetch(self, y, margin=1):
+        """Make sure the tiles within ``margin`` of row ``y`` are cached"""
+        index = y // self.tile_height
+        for neighbour in range(max(0, index - margin), index + margin + 1):
+            self.tile(neighbour)
+        # Leave the player's own tile as most recently used
+        self.tile(index)
+
+    def is_open(self, x, y):
+        """Return True if (x, y) is inside the corridor and not a wall"""
+        if not 0 <= x < self.width or y < 0:
+            return False
+        grid = self.tile(y // self.tile_height)
+        return grid.cells[(y % self.tile_height) * self.width + x] == PATH
+
+    def __getitem__(self, y):
+        if y < 0:
+            raise IndexError("row index out of range")
+        return self.tile(y // self.tile_height)[y % self.tile_height]
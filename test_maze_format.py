@@ -0,0 +1,54 @@
+"""Maze files: round trips, and headers that must be refused before play."""
+import os
+import tempfile
+import unittest
+
+from maze_core import build_level
+from maze_format import ENCODING_BITS, HEADER, MAGIC, VERSION, MazeFormatError, load_level, save_level
+
+
+def header(width=5, height=5, start=(1, 1), end=(3, 3)):
+    return HEADER.pack(MAGIC, VERSION, ENCODING_BITS, 0, width, height, 7, *start, *end, 0, 3, b"dfs")
+
+
+class MazeFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "level.maze")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, data):
+        with open(self.path, "wb") as stream:
+            stream.write(data)
+
+    def test_round_trip(self):
+        level = build_level({"size": 25, "algorithm": "kruskal"}, 3)
+        save_level(self.path, level)
+        loaded = load_level(self.path)
+        self.assertEqual(loaded.key, level.key)
+        self.assertEqual((loaded.start, loaded.end, loaded.optimal_moves),
+                         (level.start, level.end, level.optimal_moves))
+        self.assertEqual(bytes(loaded.maze.cells), bytes(level.maze.cells))
+
+    def test_bad_files_raise_maze_format_error(self):
+        cells = bytes(4)
+        cases = {
+            "empty": b"",
+            "too short": header()[:-1],
+            "zero size": header(width=0, height=0),
+            "too small": header(width=2, height=5) + cells,
+            "start outside": header(start=(9, 9)) + cells,
+            "end outside": header(end=(3, 5)) + cells,
+            "truncated": header(),
+        }
+        for case, data in cases.items():
+            with self.subTest(case):
+                self.write(data)
+                with self.assertRaises(MazeFormatError):
+                    load_level(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
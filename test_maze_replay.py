@@ -0,0 +1,171 @@
+"""Replay verification against honest, malformed and forged input.
+
+Run with ``python -m pytest``. The verifier reads blobs straight from
+clients, so every case here must come back as a result, never an exception.
+"""
+import math
+import os
+import tempfile
+import unittest
+
+from maze_core import DIRECTION_CODES, Difficulty, MazeSession, build_level
+from maze_format import load_level, save_level
+from maze_replay import HEADER, MAGIC, VERSION, Replay, ReplayError, pack_moves, verify_encoded, verify_replays
+
+EASY, MEDIUM, HARD, ENDLESS = range(4)
+
+
+def optimal_moves(level):
+    """Direction codes walking the shortest path from start to exit"""
+    x, y = level.start
+    codes = bytearray()
+    while (x, y) != level.end:
+        nx, ny = level.distance_field.next_step(x, y)
+        codes.append(DIRECTION_CODES[nx - x, ny - y])
+        x, y = nx, ny
+    return bytes(codes)
+
+
+def honest_replay(preset=EASY, seed=7, elapsed=20.0):
+    difficulty = Difficulty.PRESETS[preset]
+    level = build_level(difficulty, seed)
+    return Replay(difficulty["algorithm"], difficulty["size"], seed, preset, elapsed, optimal_moves(level))
+
+
+def forge(algorithm="dfs", size=15, seed=7, preset=EASY, elapsed=20.0, moves=b""):
+    """Encode a replay header by hand, bypassing every check in ``Replay``"""
+    name = algorithm.encode("ascii")
+    return HEADER.pack(MAGIC, VERSION, preset, len(name), size, seed, elapsed, len(moves), name) + pack_moves(moves)
+
+
+def verify_one(blob):
+    return verify_encoded([blob])[0]
+
+
+class HonestReplayTest(unittest.TestCase):
+    def test_round_trip(self):
+        replay = honest_replay()
+        decoded = Replay.decode(replay.encode())
+        self.assertEqual((decoded.algorithm, decoded.size, decoded.seed, decoded.preset, decoded.moves),
+                         (replay.algorithm, replay.size, replay.seed, replay.preset, replay.moves))
+        self.assertEqual(decoded.elapsed, replay.elapsed)
+
+    def test_optimal_run_is_valid(self):
+        for preset in (EASY, MEDIUM, HARD):
+            result = verify_one(honest_replay(preset).encode())
+            self.assertTrue(result["valid"], result)
+            self.assertIsNone(result["error"])
+            self.assertGreater(result["score"], 0)
+
+    def test_run_short_of_the_exit_is_invalid(self):
+        replay = honest_replay()
+        replay.moves = replay.moves[:-1]
+        result = verify_one(replay.encode())
+        self.assertFalse(result["valid"])
+        self.assertEqual(result["error"], "never reached the exit")
+
+    def test_endless_runs_record_no_inputs(self):
+        session = MazeSession(Difficulty.ENDLESS)
+        session.generate_new_maze(1)
+        for _ in range(100):
+            session.move(0, 1)
+        self.assertEqual(session.inputs, bytearray())
+
+    def test_moves_after_the_exit_are_invalid(self):
+        replay = honest_replay()
+        replay.moves += bytes([DIRECTION_CODES[0, -1]])
+        self.assertEqual(verify_one(replay.encode())["error"], "moves continue after the exit")
+
+
+class MalformedReplayTest(unittest.TestCase):
+    def test_header_errors(self):
+        blob = honest_replay().encode()
+        cases = {
+            "too short": blob[:HEADER.size - 1],
+            "not a replay": b"XXXX" + blob[4:],
+            "unsupported replay version": blob[:4] + bytes([VERSION + 1]) + blob[5:],
+            "unknown difficulty": blob[:5] + bytes([len(Difficulty.PRESETS)]) + blob[6:],
+            "truncated": blob[:-1],
+        }
+        for message, data in cases.items():
+            with self.subTest(message):
+                with self.assertRaisesRegex(ReplayError, message):
+                    Replay.decode(data)
+                result = verify_one(data)
+                self.assertFalse(result["valid"])
+                self.assertIn(message, result["error"])
+
+    def test_non_finite_or_negative_elapsed(self):
+        moves = honest_replay().moves
+        for elapsed in (math.nan, math.inf, -math.inf, -1.0):
+            with self.subTest(elapsed=elapsed):
+                blob = forge(elapsed=elapsed, moves=moves)
+                with self.assertRaisesRegex(ReplayError, "invalid elapsed time"):
+                    Replay.decode(blob)
+                self.assertFalse(verify_one(blob)["valid"])
+
+    def test_unknown_algorithm(self):
+        result = verify_one(forge(algorithm="nope"))
+        self.assertFalse(result["valid"])
+        self.assertIn("unknown algorithm", result["error"])
+
+
+class ForgedReplayTest(unittest.TestCase):
+    def test_endless_preset_is_rejected(self):
+        replay = honest_replay()
+        result = verify_one(forge(size=Difficulty.ENDLESS["size"], preset=ENDLESS, moves=replay.moves))
+        self.assertFalse(result["valid"])
+        self.assertIn("no exit", result["error"])
+
+    def test_size_must_match_difficulty(self):
+        # A tiny maze claimed as Hard would collect Hard's bonus for a few moves
+        level = build_level({"size": 5, "algorithm": "dfs"}, 1)
+        result = verify_one(forge(size=5, seed=1, preset=HARD, elapsed=1.0, moves=optimal_moves(level)))
+        self.assertFalse(result["valid"])
+        self.assertIn("does not match Hard", result["error"])
+
+    def test_faster_than_any_keyboard(self):
+        replay = honest_replay(elapsed=0.01)
+        self.assertEqual(verify_one(replay.encode())["error"], "faster than any keyboard")
+
+    def test_bad_blob_does_not_sink_the_batch(self):
+        good = honest_replay().encode()
+        blobs = [good, forge(elapsed=math.nan), b"", forge(preset=ENDLESS, size=31), good]
+        results = verify_replays(blobs, workers=0)
+        self.assertEqual([result["valid"] for result in results], [True, False, False, False, True])
+        self.assertTrue(all(result["error"] for result in results[1:4]))
+
+
+class LoadedLevelTest(unittest.TestCase):
+    def play_file(self, level):
+        """Save ``level``, load it into a fresh session and walk the optimal path"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "level.maze")
+            save_level(path, level)
+            clock = [100.0]
+            session = MazeSession(now=lambda: clock[0])
+            session.start_loaded_level(load_level(path))
+            clock[0] += 30.0
+            for code in optimal_moves(level):
+                session.move(*[(0, -1), (0, 1), (-1, 0), (1, 0)][code])
+            self.assertTrue(session.check_win_condition())
+            return session
+
+    def test_preset_sized_file_is_scored_and_verified_under_its_preset(self):
+        session = self.play_file(build_level(dict(Difficulty.HARD, algorithm="kruskal"), 5))
+        self.assertEqual(session.difficulty, dict(Difficulty.HARD, algorithm="kruskal"))
+        self.assertGreater(session.score, 1000)
+        result = verify_one(Replay.from_session(session).encode())
+        self.assertTrue(result["valid"], result)
+        self.assertEqual(result["score"], session.score)
+
+    def test_other_sizes_are_unranked(self):
+        session = self.play_file(build_level({"size": 21, "algorithm": "dfs"}, 5))
+        self.assertFalse(session.ranked)
+        self.assertEqual((session.score, session.rank), (0, None))
+        with self.assertRaisesRegex(ReplayError, "unranked"):
+            Replay.from_session(session)
+
+
+if __name__ == "__main__":
+    unittest.main()